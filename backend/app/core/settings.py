@@ -1,9 +1,10 @@
 """
 A single source for all environment config keeps credentials, URLs, and model names organized.
 """
-from functools import lru_cache
+from typing import Literal
+
 from pydantic import Field
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
@@ -16,28 +17,113 @@ class Settings(BaseSettings):
     mongodb_messages_collection: str = Field("messages", alias="MONGODB_MESSAGES_COLLECTION")
     mongodb_sessions_collection: str = Field("sessions", alias="MONGODB_SESSIONS_COLLECTION")
     mongodb_server_selection_timeout_ms: int = Field(5000, alias="MONGODB_SERVER_SELECTION_TIMEOUT_MS")
+    mongodb_verify_on_startup: bool = Field(True, alias="MONGODB_VERIFY_ON_STARTUP")
+    mongodb_max_pool_size: int = Field(50, alias="MONGODB_MAX_POOL_SIZE")
+    mongodb_min_pool_size: int = Field(5, alias="MONGODB_MIN_POOL_SIZE")
+    mongodb_max_idle_time_ms: int = Field(300_000, alias="MONGODB_MAX_IDLE_TIME_MS")
+    mongodb_compressors: str = Field("zstd,zlib", alias="MONGODB_COMPRESSORS")
     
     qdrant_url: str = Field("http://localhost:6333", alias="QDRANT_URL")
     qdrant_api_key: str | None = Field(default=None, alias="QDRANT_API_KEY")
+    qdrant_grpc_port: int = Field(6334, alias="QDRANT_GRPC_PORT")
+    qdrant_prefer_grpc: bool = Field(True, alias="QDRANT_PREFER_GRPC")
+    qdrant_pool_size: int = Field(100, alias="QDRANT_POOL_SIZE")
+    qdrant_keepalive_connections: int = Field(32, alias="QDRANT_KEEPALIVE_CONNECTIONS")
+    qdrant_timeout: int = Field(30, alias="QDRANT_TIMEOUT")
 
     collection_name: str = Field("wiki_rag", alias="COLLECTION_NAME")
     vector_size: int = Field(384, alias="VECTOR_SIZE")
+    qdrant_upsert_batch_size: int = Field(256, alias="QDRANT_UPSERT_BATCH_SIZE")
+    qdrant_upsert_concurrency: int = Field(
+        default=2,
+        alias="QDRANT_UPSERT_CONCURRENCY",
+        description="Maximum number of upsert requests in flight during ingestion.",
+    )
+    qdrant_hnsw_m: int = Field(
+        default=16,
+        ge=1,
+        alias="QDRANT_HNSW_M",
+        description="HNSW `m` restored after a bulk load when the collection reports it disabled.",
+    )
+    qdrant_query_batch_size: int = Field(
+        default=64,
+        alias="QDRANT_QUERY_BATCH_SIZE",
+        description="Maximum number of searches sent in one Qdrant batch query request.",
+    )
+    scalar_quantization: bool = Field(
+        default=True,
+        alias="SCALAR_QUANTIZATION",
+        description="Store an INT8 scalar-quantized copy of vectors in Qdrant for new collections.",
+    )
+    quantization_oversampling: float = Field(
+        default=2.0,
+        ge=1.0,
+        alias="QUANTIZATION_OVERSAMPLING",
+        description="Candidates taken from the quantized vectors per requested result before rescoring with the originals.",
+    )
+    vector_datatype: Literal["float32", "float16"] = Field(
+        default="float32",
+        alias="VECTOR_DATATYPE",
+        description="Storage type of original vectors in new Qdrant collections; float16 halves their memory.",
+    )
 
     embed_model: str = Field("sentence-transformers/bge-small-en-v1.5", alias="EMBED_MODEL")
+    embed_backend: Literal["torch", "onnx"] = Field(
+        default="torch",
+        alias="EMBED_BACKEND",
+        description="SentenceTransformers backend; `onnx` requires the optimum[onnxruntime] extra.",
+    )
+    embed_device: str | None = Field(
+        default=None,
+        alias="EMBED_DEVICE",
+        description="Torch device for the embedding model (e.g. cpu, cuda, mps). Auto-detected when unset.",
+    )
+    embed_fp16: bool = Field(True, alias="EMBED_FP16")
+    embed_batch_size: int = Field(16, alias="EMBED_BATCH_SIZE")
+    embed_batch_wait_ms: float = Field(10.0, alias="EMBED_BATCH_WAIT_MS")
+    embed_cache_size: int = Field(2048, alias="EMBED_CACHE_SIZE")
+    embed_cache_ttl_seconds: float = Field(600.0, alias="EMBED_CACHE_TTL_SECONDS")
+    retrieval_cache_size: int = Field(1024, alias="RETRIEVAL_CACHE_SIZE")
+    retrieval_cache_ttl_seconds: float = Field(60.0, alias="RETRIEVAL_CACHE_TTL_SECONDS")
+    embed_processes: int = Field(
+        default=0,
+        alias="EMBED_PROCESSES",
+        description="Worker processes for bulk document embedding on CPU; 0 or 1 encodes in-process.",
+    )
     ollama_host: str = Field("http://localhost:11434", alias="OLLAMA_HOST")
     ollama_model: str = Field("llama3.2:3b", alias="OLLAMA_MODEL")
+    ollama_timeout: float = Field(120.0, alias="OLLAMA_TIMEOUT")
+    ollama_pool_size: int = Field(64, alias="OLLAMA_POOL_SIZE")
+    ollama_keepalive_connections: int = Field(32, alias="OLLAMA_KEEPALIVE_CONNECTIONS")
     retriever_score_threshold: float | None = Field(
         default=None,
         alias="RETRIEVER_SCORE_THRESHOLD",
         description="Minimum similarity score required for retrieved chunks to be considered relevant.",
     )
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        extra = "allow"
+    semantic_cache_enabled: bool = Field(False, alias="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_collection: str = Field("chat_cache", alias="SEMANTIC_CACHE_COLLECTION")
+    semantic_cache_threshold: float = Field(
+        default=0.92,
+        alias="SEMANTIC_CACHE_THRESHOLD",
+        description="Minimum cosine similarity for a previous question to count as a cache hit.",
+    )
+    semantic_cache_ttl_seconds: int = Field(86_400, alias="SEMANTIC_CACHE_TTL_SECONDS")
+
+    # Frozen so the shared instance can be handed out without defensive copies.
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+        frozen=True,
+    )
+
+
+_settings: Settings | None = None
 
 
-@lru_cache
 def get_settings() -> Settings:
-    return Settings()
\ No newline at end of file
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
\ No newline at end of file
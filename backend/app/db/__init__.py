@@ -1,25 +1,43 @@
 from .mongo import (  # noqa: F401
+    backfill_session_summaries,
+    close_async_mongo_client,
     close_mongo_client,
     ensure_indexes,
+    get_async_messages_collection,
+    get_async_mongo_client,
+    get_async_sessions_collection,
     get_database,
     get_messages_collection,
     get_mongo_client,
     verify_connection,
 )
+from .mongo import verify_connection_async as verify_mongo_connection_async  # noqa: F401
 from .qdrant import (  # noqa: F401
+    close_async_qdrant_client,
     close_qdrant_client,
     ensure_collection,
+    ensure_payload_indexes,
+    get_async_qdrant_client,
     get_qdrant_client,
 )
 
 __all__ = [
+    "backfill_session_summaries",
+    "close_async_mongo_client",
+    "close_async_qdrant_client",
     "close_mongo_client",
     "close_qdrant_client",
     "ensure_collection",
     "ensure_indexes",
+    "ensure_payload_indexes",
+    "get_async_messages_collection",
+    "get_async_mongo_client",
+    "get_async_sessions_collection",
+    "get_async_qdrant_client",
     "get_database",
     "get_messages_collection",
     "get_mongo_client",
     "get_qdrant_client",
     "verify_connection",
+    "verify_mongo_connection_async",
 ]
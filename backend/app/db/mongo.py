@@ -2,9 +2,10 @@
 Utilities for configuring and accessing the MongoDB deployment backing chat history.
 """
 from __future__ import annotations
-from functools import lru_cache
+from typing import Any
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import IndexModel, MongoClient
 from pymongo.collection import Collection
 from pymongo.database import Database
 from pymongo.errors import ServerSelectionTimeoutError
@@ -12,31 +13,98 @@ from pymongo.errors import ServerSelectionTimeoutError
 from app.core.settings import get_settings
 
 
-@lru_cache(maxsize=1)
-def _client() -> MongoClient:
+def _client_options() -> dict[str, Any]:
     """
-    Lazily build a single MongoClient for the process.
+    Connection options shared by the sync and async clients.
 
-    MongoClient pools connections internally and is safe to reuse across threads.
-    Using an lru_cache keeps the implementation simple while giving us an easy
-    hook for cleaning up during application shutdown.
+    The pool is bounded so bursts of requests queue for a connection instead of
+    opening new sockets, and compression shrinks message payloads on the wire.
     """
     settings = get_settings()
-    return MongoClient(settings.mongodb_uri,
-                       uuidRepresentation="standard",
-                       serverSelectionTimeoutMS=settings.mongodb_server_selection_timeout_ms)
+    return {
+        "uuidRepresentation": "standard",
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+        "compressors": settings.mongodb_compressors,
+        "retryWrites": True,
+    }
+
+
+SESSION_CREATED_AT_INDEX = "session_id_created_at_id_idx"
+# Earlier message indexes that are prefixes of SESSION_CREATED_AT_INDEX; dropped at startup
+# so every insert stops maintaining them.
+_SUPERSEDED_MESSAGE_INDEXES = ("session_id_idx", "session_id_created_at_idx")
+# Characters of the latest message kept on the session document for sidebar previews.
+SESSION_PREVIEW_LENGTH = 200
+# How long a deleted session's tombstone is kept; it only needs to outlive pending writes.
+SESSION_TOMBSTONE_TTL_SECONDS = 24 * 60 * 60
+
+_client: MongoClient | None = None
+_async_client: AsyncIOMotorClient | None = None
+_messages_collection: Collection | None = None
+_sessions_collection: Collection | None = None
+_async_messages_collection: AsyncIOMotorCollection | None = None
+_async_sessions_collection: AsyncIOMotorCollection | None = None
+
+
+def _build_client() -> MongoClient:
+    """
+    Build the MongoClient for the process.
+
+    MongoClient pools connections internally and is safe to reuse across threads, so a
+    single module-level instance serves every caller; access is a plain `None` check.
+    """
+    settings = get_settings()
+    return MongoClient(settings.mongodb_uri, **_client_options())
+
+
+def _build_async_client() -> AsyncIOMotorClient:
+    """
+    Build the Motor client for request handlers running on the event loop.
+
+    The synchronous client stays available for ingestion code that already runs in a
+    worker thread.
+    """
+    settings = get_settings()
+    return AsyncIOMotorClient(settings.mongodb_uri, **_client_options())
 
 
 def get_mongo_client() -> MongoClient:
     """Return the shared MongoClient instance."""
-    return _client()
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+def get_async_mongo_client() -> AsyncIOMotorClient:
+    """Return the shared AsyncIOMotorClient instance."""
+    global _async_client
+    if _async_client is None:
+        _async_client = _build_async_client()
+    return _async_client
 
 
 def close_mongo_client() -> None:
-    """Close the cached MongoClient and clear the cache."""
-    client = _client()
-    client.close()
-    _client.cache_clear()
+    """Close the shared MongoClient and drop the handles derived from it."""
+    global _client, _messages_collection, _sessions_collection
+    if _client is not None:
+        _client.close()
+    _client = None
+    _messages_collection = None
+    _sessions_collection = None
+
+
+def close_async_mongo_client() -> None:
+    """Close the shared AsyncIOMotorClient and drop the handles derived from it."""
+    global _async_client, _async_messages_collection, _async_sessions_collection
+    if _async_client is not None:
+        _async_client.close()
+    _async_client = None
+    _async_messages_collection = None
+    _async_sessions_collection = None
 
 
 def get_database(client: MongoClient | None = None) -> Database:
@@ -48,6 +116,12 @@ def get_database(client: MongoClient | None = None) -> Database:
 
 def get_messages_collection(client: MongoClient | None = None) -> Collection:
     """Return the collection used to persist chat messages."""
+    global _messages_collection
+    if client is None:
+        # Resolve the handle on the shared client once per process.
+        if _messages_collection is None:
+            _messages_collection = get_database()[get_settings().mongodb_messages_collection]
+        return _messages_collection
     settings = get_settings()
     database = get_database(client)
     return database[settings.mongodb_messages_collection]
@@ -55,23 +129,117 @@ def get_messages_collection(client: MongoClient | None = None) -> Collection:
 
 def get_sessions_collection(client: MongoClient | None = None) -> Collection:
     """Return the collection used to store chat session metadata."""
+    global _sessions_collection
+    if client is None:
+        if _sessions_collection is None:
+            _sessions_collection = get_database()[get_settings().mongodb_sessions_collection]
+        return _sessions_collection
     settings = get_settings()
     database = get_database(client)
     return database[settings.mongodb_sessions_collection]
 
 
+def get_async_messages_collection() -> AsyncIOMotorCollection:
+    """Return the Motor collection used to persist chat messages."""
+    global _async_messages_collection
+    if _async_messages_collection is None:
+        settings = get_settings()
+        database = get_async_mongo_client()[settings.mongodb_database]
+        _async_messages_collection = database[settings.mongodb_messages_collection]
+    return _async_messages_collection
+
+
+def get_async_sessions_collection() -> AsyncIOMotorCollection:
+    """Return the Motor collection used to store chat session metadata."""
+    global _async_sessions_collection
+    if _async_sessions_collection is None:
+        settings = get_settings()
+        database = get_async_mongo_client()[settings.mongodb_database]
+        _async_sessions_collection = database[settings.mongodb_sessions_collection]
+    return _async_sessions_collection
+
+
 def ensure_indexes(client: MongoClient | None = None) -> None:
     """
     Create the indexes that the chat flow relies on.
 
     Index builds in MongoDB are idempotent, so running this on every boot is safe.
+    Indexes on the same collection are sent in a single createIndexes command.
     """
     collection = get_messages_collection(client)
-    collection.create_index("session_id", name="session_id_idx")
-    collection.create_index([("created_at", -1)], name="created_at_desc_idx")
+    collection.create_indexes(
+        [
+            # Serves every session_id lookup, including the (created_at, _id) sort used
+            # when reading a session's messages and the per-session backfill sort.
+            IndexModel(
+                [("session_id", 1), ("created_at", 1), ("_id", 1)],
+                name=SESSION_CREATED_AT_INDEX,
+            ),
+            IndexModel([("created_at", -1)], name="created_at_desc_idx"),
+        ]
+    )
+    existing = collection.index_information()
+    for name in _SUPERSEDED_MESSAGE_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+
+    sessions_collection = get_sessions_collection(client)
+    sessions_collection.create_indexes(
+        [
+            IndexModel("session_id", name="session_id_unique", unique=True),
+            # Backs the session listing, which reads the denormalized summaries directly.
+            IndexModel([("last_message_at", -1)], name="last_message_at_desc_idx"),
+            # Only tombstones carry `deleted_at`, so live sessions never expire.
+            IndexModel(
+                "deleted_at",
+                name="deleted_at_ttl_idx",
+                expireAfterSeconds=SESSION_TOMBSTONE_TTL_SECONDS,
+            ),
+        ]
+    )
 
+
+def backfill_session_summaries(client: MongoClient | None = None) -> None:
+    """
+    Populate message counters on session documents created before they were maintained.
+
+    Session documents carry `message_count` and the last message fields, updated on every
+    chat exchange. Deployments that predate those counters are migrated once by folding
+    the messages collection into the sessions collection; the check is skipped as soon as
+    any session carries a counter. Requires the unique `session_id` index for `$merge`.
+    """
+    settings = get_settings()
     sessions_collection = get_sessions_collection(client)
-    sessions_collection.create_index("session_id", name="session_id_unique", unique=True)
+    if sessions_collection.find_one({"message_count": {"$exists": True}}, projection={"_id": 1}):
+        return
+
+    messages_collection = get_messages_collection(client)
+    messages_collection.aggregate(
+        [
+            {"$match": {"session_id": {"$type": "string"}}},
+            {"$sort": {"session_id": 1, "created_at": 1}},
+            {
+                "$group": {
+                    "_id": "$session_id",
+                    "message_count": {"$sum": 1},
+                    "last_message_at": {"$last": "$created_at"},
+                    "last_message_role": {"$last": "$role"},
+                    "last_message_preview": {"$last": {"$substrCP": ["$content", 0, SESSION_PREVIEW_LENGTH]}},
+                }
+            },
+            {"$addFields": {"session_id": "$_id"}},
+            {"$project": {"_id": 0}},
+            {
+                "$merge": {
+                    "into": settings.mongodb_sessions_collection,
+                    "on": "session_id",
+                    "whenMatched": "merge",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ],
+        hint=SESSION_CREATED_AT_INDEX,
+    )
 
 
 def verify_connection(client: MongoClient | None = None) -> None:
@@ -89,3 +257,16 @@ def verify_connection(client: MongoClient | None = None) -> None:
             "Unable to connect to MongoDB with the configured URI."
         ) from exc
 
+
+async def verify_connection_async(client: AsyncIOMotorClient | None = None) -> None:
+    """
+    Async counterpart of `verify_connection` that does not block the event loop.
+    """
+    client = client or get_async_mongo_client()
+    try:
+        await client.admin.command("ping")
+    except ServerSelectionTimeoutError as exc:  # pragma: no cover - defensive
+        raise ConnectionError(
+            "Unable to connect to MongoDB with the configured URI."
+        ) from exc
+
@@ -2,17 +2,32 @@
 Convenience exports for working with the shared embedding model.
 """
 
+from .batcher import (
+    QueryBatcher,
+    embed_query_batched,
+    get_query_batcher,
+)
+from .cache import QueryEmbeddingCache, get_query_embedding_cache
 from .model import (
+    close_embedding_process_pool,
     embed_documents,
     embed_query,
     encode,
     get_embedding_model,
+    get_embedding_process_pool,
 )
 
 __all__ = [
+    "QueryBatcher",
+    "QueryEmbeddingCache",
+    "close_embedding_process_pool",
     "embed_documents",
     "embed_query",
+    "embed_query_batched",
     "encode",
     "get_embedding_model",
+    "get_embedding_process_pool",
+    "get_query_batcher",
+    "get_query_embedding_cache",
 ]
 
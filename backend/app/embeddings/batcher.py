@@ -0,0 +1,133 @@
+"""
+Coalesce concurrent single-query embedding requests into batched model calls.
+"""
+from __future__ import annotations
+
+import asyncio
+from functools import cache
+
+from app.core.settings import get_settings
+from app.embeddings.cache import get_query_embedding_cache
+from app.embeddings.model import encode
+
+
+def _fail_pending(batch: list[tuple[str, asyncio.Future]], exc: BaseException) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(exc)
+
+
+class QueryBatcher:
+    """
+    Collect queries submitted within a short window and embed them in one model call.
+
+    Encoding one string at a time leaves most of the model's throughput unused; under
+    concurrent chat traffic the batcher trades a few milliseconds of queueing for a
+    single forward pass over every pending query.
+    """
+
+    def __init__(self, *, max_batch: int = 16, max_wait_ms: float = 10.0):
+        if max_batch < 1:
+            raise ValueError("Batch size must be at least 1.")
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future]] | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _ensure_worker(self) -> asyncio.Queue[tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        # Queues and tasks are bound to a loop; start fresh if the loop changed.
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def embed(self, query: str) -> list[float]:
+        """
+        Queue a query for the next batch and wait for its normalized embedding.
+        """
+        queue = self._ensure_worker()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        await queue.put((query, future))
+        return await future
+
+    async def _collect(
+        self,
+        queue: asyncio.Queue[tuple[str, asyncio.Future]],
+        batch: list[tuple[str, asyncio.Future]],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        batch.append(await queue.get())
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self, queue: asyncio.Queue[tuple[str, asyncio.Future]]) -> None:
+        batch: list[tuple[str, asyncio.Future]] = []
+        try:
+            while True:
+                batch = []
+                await self._collect(queue, batch)
+                queries = [query for query, _ in batch]
+                try:
+                    embeddings = await asyncio.to_thread(encode, queries, batch_size=len(queries))
+                except Exception as exc:
+                    _fail_pending(batch, exc)
+                    continue
+
+                for (_, future), embedding in zip(batch, embeddings):
+                    if not future.done():
+                        future.set_result(embedding.tolist())
+        except asyncio.CancelledError:
+            # Queries already taken off the queue would otherwise wait forever.
+            _fail_pending(batch, RuntimeError("Query batcher was closed."))
+            raise
+
+    async def aclose(self) -> None:
+        """
+        Stop the background worker if it is running and fail any queries still waiting.
+        """
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        if self._queue is not None:
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            _fail_pending(pending, RuntimeError("Query batcher was closed."))
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+
+@cache
+def get_query_batcher() -> QueryBatcher:
+    """Return the process-wide query batcher."""
+    settings = get_settings()
+    return QueryBatcher(
+        max_batch=settings.embed_batch_size,
+        max_wait_ms=settings.embed_batch_wait_ms,
+    )
+
+
+async def embed_query_batched(query: str) -> list[float]:
+    """
+    Async counterpart of `embed_query` that shares model calls with concurrent requests.
+    """
+    query_cache = get_query_embedding_cache()
+    vector = query_cache.get(query)
+    if vector is None:
+        vector = await get_query_batcher().embed(query)
+        query_cache.put(query, vector)
+    return vector
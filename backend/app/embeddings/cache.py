@@ -0,0 +1,49 @@
+"""
+Bounded, time-limited cache for query embeddings.
+"""
+from __future__ import annotations
+
+import threading
+from functools import cache
+
+from cachetools import TTLCache
+
+from app.core.settings import get_settings
+
+
+class QueryEmbeddingCache:
+    """
+    Thread-safe LRU + TTL cache keyed on the exact query text.
+
+    Chat clients often resend the same question (retries, reloads), so a hit skips the
+    model call entirely. Cached vectors are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._cache: TTLCache[str, list[float]] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> list[float] | None:
+        with self._lock:
+            try:
+                return self._cache[query]
+            except KeyError:
+                return None
+
+    def put(self, query: str, vector: list[float]) -> None:
+        with self._lock:
+            self._cache[query] = vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+@cache
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Return the process-wide query embedding cache."""
+    settings = get_settings()
+    return QueryEmbeddingCache(
+        maxsize=settings.embed_cache_size,
+        ttl=settings.embed_cache_ttl_seconds,
+    )
@@ -3,23 +3,112 @@ Wrapper around SentenceTransformers to produce normalized embeddings.
 """
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import Iterable, Sequence, TYPE_CHECKING, overload
+import os
+import threading
+from typing import Any, Iterable, Sequence, TYPE_CHECKING, overload
 
 import numpy as np
 
 from app.core.settings import get_settings
+from app.embeddings.cache import get_query_embedding_cache
 
 if TYPE_CHECKING:
     from sentence_transformers import SentenceTransformer
 
 
-@lru_cache(maxsize=1)
+_model: "SentenceTransformer | None" = None
+_model_lock = threading.Lock()
+_process_pool: dict[str, Any] | None = None
+_process_pool_lock = threading.Lock()
+
+
 def get_embedding_model() -> "SentenceTransformer":
     """
-    Load and cache the SentenceTransformers embedding model.
+    Return the shared embedding model, loading it on first use.
+
+    Once loaded, access is a single `None` check. The model may be warmed from a
+    background thread at startup while a request asks for it; the lock makes the
+    late caller wait for that load instead of starting a second one.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = _load_embedding_model()
+    return _model
+
+
+def get_embedding_process_pool() -> dict[str, Any] | None:
+    """
+    Return the worker pool used for bulk document embedding, or None when disabled.
+
+    With `EMBED_PROCESSES` above one and the model on CPU, each worker process loads
+    its own copy of the model and runs single-threaded, so slices of a large batch are
+    encoded in parallel instead of contending for the GIL and the same cores.
+    Accelerators already parallelize a batch and keep encoding in-process.
+    """
+    global _process_pool
+    processes = get_settings().embed_processes
+    if processes <= 1:
+        return None
+
+    model = get_embedding_model()
+    if model.device.type != "cpu":
+        return None
+
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                _process_pool = _start_process_pool(model, processes)
+    return _process_pool
+
+
+def _start_process_pool(model: "SentenceTransformer", processes: int) -> dict[str, Any]:
+    # Workers inherit the environment at spawn time; one intra-op thread each keeps
+    # N processes from oversubscribing the cores they are meant to split.
+    previous = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = "1"
+    try:
+        return model.start_multi_process_pool(target_devices=["cpu"] * processes)
+    finally:
+        if previous is None:
+            os.environ.pop("OMP_NUM_THREADS", None)
+        else:
+            os.environ["OMP_NUM_THREADS"] = previous
+
+
+def close_embedding_process_pool() -> None:
+    """
+    Stop the embedding worker processes if they were started.
+    """
+    global _process_pool
+    if _process_pool is not None and _model is not None:
+        _model.stop_multi_process_pool(_process_pool)
+    _process_pool = None
+
+
+def _resolve_device(configured: str | None) -> str:
+    """
+    Pick the accelerator to run the encoder on unless one is configured explicitly.
+    """
+    if configured:
+        return configured
+
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _load_embedding_model() -> "SentenceTransformer":
+    """
+    Load the SentenceTransformers embedding model.
 
-    The model name comes from the `EMBED_MODEL` setting. We validate that the
+    The model name comes from the `EMBED_MODEL` setting and runs on the best
+    available device (`EMBED_DEVICE` overrides detection). We validate that the
     embedding dimensionality matches the configured vector size to guard against
     runtime mismatches with Qdrant.
     """
@@ -28,7 +117,13 @@ def get_embedding_model() -> "SentenceTransformer":
 
     from sentence_transformers import SentenceTransformer
 
-    model = SentenceTransformer(model_name)
+    device = _resolve_device(settings.embed_device)
+    # The ONNX backend runs an exported, graph-optimized encoder through onnxruntime,
+    # which avoids eager PyTorch dispatch overhead on small models like BGE-small.
+    model = SentenceTransformer(model_name, device=device, backend=settings.embed_backend)
+    # Half precision halves memory traffic on accelerators; CPU kernels gain nothing from it.
+    if settings.embed_backend == "torch" and settings.embed_fp16 and device != "cpu":
+        model.half()
 
     expected_dimension = settings.vector_size
     actual_dimension = model.get_sentence_embedding_dimension()
@@ -41,16 +136,6 @@ def get_embedding_model() -> "SentenceTransformer":
     return model
 
 
-def _normalize(vectors: np.ndarray) -> np.ndarray:
-    """
-    L2-normalize the embeddings. Avoid division by zero by leaving zero vectors unchanged.
-    """
-    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
-    # Replace zeros with ones to avoid division errors; zero vectors remain zero.
-    norms[norms == 0.0] = 1.0
-    return vectors / norms
-
-
 @overload
 def encode(texts: str, *, normalize: bool = True, batch_size: int = 32) -> np.ndarray: ...
 
@@ -90,12 +175,9 @@ def encode(texts: str | Sequence[str],
         batch_size=batch_size,
         convert_to_numpy=True,
         show_progress_bar=False,
-        normalize_embeddings=False,
+        normalize_embeddings=normalize,
     )
 
-    if normalize:
-        embeddings = _normalize(embeddings)
-
     if is_single_text:
         return embeddings[0]
     return embeddings
@@ -103,15 +185,31 @@ def encode(texts: str | Sequence[str],
 
 def embed_query(query: str) -> list[float]:
     """
-    Convenience helper for single-query embedding.
+    Convenience helper for single-query embedding. Repeated queries are served from cache.
     """
-    return encode(query).tolist()
+    query_cache = get_query_embedding_cache()
+    vector = query_cache.get(query)
+    if vector is None:
+        vector = encode(query).tolist()
+        query_cache.put(query, vector)
+    return vector
 
 
-def embed_documents(documents: Sequence[str], *, batch_size: int = 32) -> list[list[float]]:
+def embed_documents(documents: Sequence[str], *, batch_size: int = 32) -> np.ndarray:
     """
-    Encode a batch of documents into embeddings.
+    Encode a batch of documents into an (n, dim) embedding matrix.
+
+    The array is returned as-is so callers convert only the rows they actually send.
+    Batches larger than `batch_size` are spread over the embedding process pool when
+    one is configured.
     """
-    embeddings = encode(documents, batch_size=batch_size)
-    return embeddings.tolist()
+    pool = get_embedding_process_pool()
+    if pool is not None and len(documents) > batch_size:
+        return get_embedding_model().encode_multi_process(
+            list(documents),
+            pool,
+            batch_size=batch_size,
+            normalize_embeddings=True,
+        )
+    return encode(documents, batch_size=batch_size)
 
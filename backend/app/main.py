@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -5,34 +7,70 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.settings import get_settings
 from app.db import (
+    backfill_session_summaries,
+    close_async_mongo_client,
+    close_async_qdrant_client,
     close_mongo_client,
     close_qdrant_client,
     ensure_collection,
     ensure_indexes,
+    ensure_payload_indexes,
     get_mongo_client,
     get_qdrant_client,
-    verify_connection,
+    verify_mongo_connection_async,
 )
+from app.embeddings import close_embedding_process_pool, get_embedding_model, get_query_batcher
 from app.routers import chat
 from app.routers import health
 from app.routers import ingest
 from app.routers import knowledge
+from app.services import SemanticCache, close_ollama_client, close_wikipedia_session
+
+logger = logging.getLogger(__name__)
+
+
+def _log_warmup_failure(future: asyncio.Future) -> None:
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Embedding model warm-up failed; it will be retried on first use", exc_info=exc)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    settings = get_settings()
+    # Index and collection setup below fail fast on their own; the explicit ping only
+    # adds a clearer error message at the cost of an extra round trip.
+    if settings.mongodb_verify_on_startup:
+        await verify_mongo_connection_async()
+
     mongo_client = get_mongo_client()
-    verify_connection(mongo_client)
     ensure_indexes(mongo_client)
+    backfill_session_summaries(mongo_client)
 
     qdrant_client = get_qdrant_client()
     ensure_collection(qdrant_client)
+    ensure_payload_indexes(qdrant_client)
+    if settings.semantic_cache_enabled:
+        ensure_collection(qdrant_client, collection_name=settings.semantic_cache_collection)
+        SemanticCache(qdrant_client=qdrant_client).purge_expired()
+
+    # Load the embedding model off the event loop so the first chat request does not pay for it.
+    warmup = asyncio.get_running_loop().run_in_executor(None, get_embedding_model)
+    warmup.add_done_callback(_log_warmup_failure)
 
     try:
         yield
     finally:
+        await get_query_batcher().aclose()
+        close_embedding_process_pool()
+        await close_ollama_client()
+        close_wikipedia_session()
         close_mongo_client()
+        close_async_mongo_client()
         close_qdrant_client()
+        await close_async_qdrant_client()
 
 
 def create_app() -> FastAPI:
@@ -41,6 +41,16 @@ class WikipediaIngestRequest(BaseModel):
         le=400,
         description="Number of tokens to overlap between consecutive chunks.",
     )
+    embedding_chunk_size: int = Field(
+        256,
+        ge=1,
+        le=4096,
+        description="Number of chunks, pooled across pages, sent to the embedding model per call.",
+    )
+    bulk_mode: bool = Field(
+        False,
+        description="If true, pause HNSW graph building while upserting and rebuild it once at the end.",
+    )
     dry_run: bool = Field(
         False,
         description="If true, fetch and process pages but skip embedding/upsert.",
@@ -94,6 +104,16 @@ class WikipediaUrlIngestRequest(BaseModel):
         le=400,
         description="Number of tokens to overlap between consecutive chunks.",
     )
+    embedding_chunk_size: int = Field(
+        256,
+        ge=1,
+        le=4096,
+        description="Number of chunks, pooled across pages, sent to the embedding model per call.",
+    )
+    bulk_mode: bool = Field(
+        False,
+        description="If true, pause HNSW graph building while upserting and rebuild it once at the end.",
+    )
     dry_run: bool = Field(
         False,
         description="If true, fetch and process pages but skip embedding/upsert.",
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from time import perf_counter
-from typing import Any, Iterable, List
+from typing import Any, AsyncIterator, Iterable, List
 from uuid import uuid4
 
 import httpx
-from fastapi import APIRouter, HTTPException, Query, Response
-from fastapi.concurrency import run_in_threadpool
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from starlette import status
 
 from app.core.settings import get_settings
-from app.db.mongo import get_messages_collection, get_sessions_collection
+from app.db.mongo import (
+    SESSION_PREVIEW_LENGTH,
+    get_async_messages_collection,
+    get_async_sessions_collection,
+)
 from app.models import (
     ChatRequest,
     ChatResponse,
@@ -21,17 +29,68 @@ from app.models import (
     ChatSource,
     StoredChatMessage,
 )
-from app.services import ChatTurn, OllamaClient, PromptBuilder, QueryRetriever, RetrievedChunk
+from app.services import (
+    CachedAnswer,
+    ChatTurn,
+    OllamaError,
+    RetrievedChunk,
+    SemanticCache,
+    get_ollama_client,
+    get_prompt_builder,
+    get_query_retriever,
+    get_semantic_cache,
+)
+from pydantic import TypeAdapter
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter()
-
-
-def _build_sources(chunks: Iterable[RetrievedChunk]) -> list[ChatSource]:
+logger = logging.getLogger(__name__)
+
+# Only the fields the response models read; message metadata holds more than latency.
+_MESSAGE_PROJECTION = {
+    "role": 1,
+    "content": 1,
+    "created_at": 1,
+    "sources": 1,
+    "metadata.latency_ms": 1,
+}
+_SESSION_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "session_id": 1,
+    "title": 1,
+    "message_count": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "last_message_at": 1,
+    "last_message_role": 1,
+    "last_message_preview": 1,
+}
+
+# Chunk payload keys read by `_assemble_context`; ingestion stores more than the prompt needs.
+_CONTEXT_PAYLOAD_FIELDS = ("content", "title", "url", "chunk_index", "page_id", "topic")
+
+_EMPTY_ANSWER = "I'm sorry, I wasn't able to generate a response."
+
+# Validates a message's stored sources in one core call instead of one model per source.
+_SOURCES_ADAPTER = TypeAdapter(list[ChatSource])
+
+
+def _assemble_context(chunks: Iterable[RetrievedChunk]) -> tuple[list[str], list[ChatSource]]:
+    """
+    Collect prompt contexts and de-duplicated sources in a single pass over the chunks.
+
+    Sources are only reported when at least one chunk carried usable content.
+    """
+    contexts: list[str] = []
     sources: list[ChatSource] = []
     seen_keys: set[tuple] = set()
     for chunk in chunks:
         payload = chunk.payload
+        text = payload.get("content")
+        if text:
+            contexts.append(text)
+
         key = (
             payload.get("url"),
             payload.get("page_id"),
@@ -52,134 +111,113 @@ def _build_sources(chunks: Iterable[RetrievedChunk]) -> list[ChatSource]:
                 score=chunk.score,
             )
         )
-    return sources
-
-
-def _extract_contexts(chunks: Iterable[RetrievedChunk]) -> list[str]:
-    contexts: list[str] = []
-    for chunk in chunks:
-        text = chunk.payload.get("content")
-        if not text:
-            continue
-        contexts.append(text)
-    return contexts
+    if not contexts:
+        return contexts, []
+    return contexts, sources
 
 
 async def _insert_messages(documents: list[dict]) -> None:
-    collection = get_messages_collection()
-
-    def _bulk_insert():
-        if not documents:
-            return
-        collection.insert_many(documents)
-
-    await run_in_threadpool(_bulk_insert)
-
-
-async def _ensure_session_metadata(session_id: str, created_at: datetime, default_title: str) -> None:
-    collection = get_sessions_collection()
-
-    def _upsert():
-        collection.update_one(
-            {"session_id": session_id},
+    if not documents:
+        return
+    collection = get_async_messages_collection()
+    await collection.insert_many(documents)
+
+
+async def _record_exchange(
+    session_id: str,
+    *,
+    message_count: int,
+    last_message: dict,
+    default_title: str,
+) -> bool:
+    """
+    Create the session document if needed and roll the new messages into its summary.
+
+    Keeping the counters on the session document lets listings and updates read one
+    document instead of counting and scanning the session's messages. Returns False
+    when the session has been deleted: its tombstone keeps the `session_id`, so the
+    upsert collides with the unique index instead of resurrecting the session.
+    """
+    collection = get_async_sessions_collection()
+    try:
+        await collection.update_one(
+            {"session_id": session_id, "deleted_at": {"$exists": False}},
             {
                 "$setOnInsert": {
                     "session_id": session_id,
                     "title": default_title,
-                    "created_at": created_at,
-                }
+                    "created_at": last_message["created_at"],
+                },
+                "$inc": {"message_count": message_count},
+                "$set": {
+                    "last_message_at": last_message["created_at"],
+                    "last_message_role": last_message["role"],
+                    "last_message_preview": last_message["content"][:SESSION_PREVIEW_LENGTH],
+                },
             },
             upsert=True,
         )
+    except DuplicateKeyError:
+        return False
+    return True
+
 
-    await run_in_threadpool(_upsert)
+def _session_summary(document: dict[str, Any]) -> ChatSessionSummary | None:
+    session_id = document.get("session_id")
+    if not isinstance(session_id, str):
+        return None
+
+    title = document.get("title") or "New Conversation"
+    if not isinstance(title, str) or not title.strip():
+        title = "New Conversation"
+
+    last_message_at = document.get("last_message_at")
+    if not isinstance(last_message_at, datetime):
+        fallback_time = document.get("updated_at") or document.get("created_at")
+        if isinstance(fallback_time, datetime):
+            last_message_at = fallback_time
+        else:
+            last_message_at = datetime.fromtimestamp(0, tz=timezone.utc)
+
+    last_message_preview = document.get("last_message_preview")
+    if isinstance(last_message_preview, str):
+        last_message_preview = last_message_preview.strip() or None
+    else:
+        last_message_preview = None
+
+    return ChatSessionSummary(
+        session_id=session_id,
+        title=title,
+        message_count=document.get("message_count", 0),
+        last_message_at=last_message_at,
+        last_message_role=document.get("last_message_role"),
+        last_message_preview=last_message_preview,
+    )
 
 
 @router.get(
     "/sessions",
     summary="List stored chat sessions.",
     response_model=List[ChatSessionSummary],
+    response_model_exclude_none=True,
 )
 async def list_sessions(
     limit: int = Query(50, ge=1, le=200, description="Maximum number of sessions to return."),
 ) -> List[ChatSessionSummary]:
-    collection = get_messages_collection()
-    sessions_collection = get_sessions_collection()
+    sessions_collection = get_async_sessions_collection()
 
-    def _aggregate() -> List[dict[str, Any]]:
-        pipeline = [
-            {"$match": {"session_id": {"$type": "string"}}},
-            {"$sort": {"created_at": 1}},
-            {
-                "$group": {
-                    "_id": "$session_id",
-                    "title": {"$first": "$content"},
-                    "message_count": {"$sum": 1},
-                    "last_message_at": {"$last": "$created_at"},
-                    "last_message_role": {"$last": "$role"},
-                    "last_message_preview": {"$last": "$content"},
-                }
-            },
-            {"$sort": {"last_message_at": -1}},
-            {"$limit": limit},
-        ]
-        return list(collection.aggregate(pipeline))
-
-    documents = await run_in_threadpool(_aggregate)
-    session_ids = [document.get("_id") for document in documents if isinstance(document.get("_id"), str)]
-
-    def _load_metadata() -> dict[str, dict[str, Any]]:
-        if not session_ids:
-            return {}
-        cursor = sessions_collection.find({"session_id": {"$in": session_ids}})
-        metadata: dict[str, dict[str, Any]] = {}
-        for document in cursor:
-            session_id = document.get("session_id")
-            if isinstance(session_id, str):
-                metadata[session_id] = document
-        return metadata
-
-    try:
-        metadata_map = await run_in_threadpool(_load_metadata)
-    except Exception:  # pragma: no cover - defensive
-        metadata_map = {}
+    documents = await (
+        sessions_collection.find({"message_count": {"$gt": 0}}, projection=_SESSION_SUMMARY_PROJECTION)
+        .sort("last_message_at", -1)
+        .limit(limit)
+        .to_list(length=None)
+    )
 
     summaries: List[ChatSessionSummary] = []
     for document in documents:
-        session_id = document.get("_id")
-        if not isinstance(session_id, str):
-            continue
-        metadata = metadata_map.get(session_id, {})
-        title = metadata.get("title") or "New Conversation"
-        if not isinstance(title, str) or not title.strip():
-            title = "New Conversation"
-
-        last_message_at = document.get("last_message_at")
-        if not isinstance(last_message_at, datetime):
-            fallback_time = metadata.get("updated_at") or metadata.get("created_at")
-            if isinstance(fallback_time, datetime):
-                last_message_at = fallback_time
-            else:
-                last_message_at = datetime.fromtimestamp(0, tz=timezone.utc)
-
-        last_message_preview = document.get("last_message_preview")
-        if last_message_preview is None:
-            last_message_preview = metadata.get("last_message_preview")
-        if isinstance(last_message_preview, str):
-            last_message_preview = last_message_preview.strip() or None
-        else:
-            last_message_preview = None
-
-        summaries.append(
-            ChatSessionSummary(
-                session_id=session_id,
-                title=title,
-                message_count=document.get("message_count", 0),
-                last_message_at=last_message_at,
-                last_message_role=document.get("last_message_role"),
-                last_message_preview=last_message_preview,
-            )
-        )
+        summary = _session_summary(document)
+        if summary is not None:
+            summaries.append(summary)
 
     return summaries
 
@@ -188,17 +226,16 @@ async def list_sessions(
     "/sessions/{session_id}/messages",
     summary="Retrieve messages for a specific session.",
     response_model=ChatSessionMessages,
+    response_model_exclude_none=True,
 )
 async def get_session_messages(session_id: str) -> ChatSessionMessages:
-    collection = get_messages_collection()
+    collection = get_async_messages_collection()
 
-    def _fetch() -> List[dict[str, Any]]:
-        cursor = collection.find({"session_id": session_id}).sort(
-            [("created_at", 1), ("_id", 1)]
-        )
-        return list(cursor)
-
-    documents = await run_in_threadpool(_fetch)
+    cursor = collection.find(
+        {"session_id": session_id},
+        projection=_MESSAGE_PROJECTION,
+    ).sort([("created_at", 1), ("_id", 1)])
+    documents = await cursor.to_list(length=None)
     if not documents:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
 
@@ -206,7 +243,7 @@ async def get_session_messages(session_id: str) -> ChatSessionMessages:
     for document in documents:
         metadata = document.get("metadata") or {}
         sources_payload = document.get("sources") or []
-        sources = [ChatSource(**source) for source in sources_payload]
+        sources = _SOURCES_ADAPTER.validate_python(sources_payload)
         messages.append(
             StoredChatMessage(
                 id=str(document.get("_id")),
@@ -227,21 +264,32 @@ async def get_session_messages(session_id: str) -> ChatSessionMessages:
     status_code=status.HTTP_204_NO_CONTENT,
 )
 async def delete_session(session_id: str) -> Response:
-    collection = get_messages_collection()
-    sessions_collection = get_sessions_collection()
-
-    def _delete() -> int:
-        result = collection.delete_many({"session_id": session_id})
-        return result.deleted_count
-
-    deleted = await run_in_threadpool(_delete)
-    if deleted == 0:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
-
-    def _delete_metadata() -> None:
-        sessions_collection.delete_one({"session_id": session_id})
-
-    await run_in_threadpool(_delete_metadata)
+    collection = get_async_messages_collection()
+    sessions_collection = get_async_sessions_collection()
+
+    # Leave a tombstone rather than dropping the session document, so an exchange still
+    # being persisted in the background cannot recreate the session (see `_record_exchange`).
+    # Tombstones expire through the TTL index on `deleted_at`.
+    tombstone = {
+        "$set": {"deleted_at": datetime.now(timezone.utc), "message_count": 0},
+        "$unset": {
+            "title": "",
+            "last_message_at": "",
+            "last_message_role": "",
+            "last_message_preview": "",
+        },
+    }
+    previous = await sessions_collection.find_one_and_update(
+        {"session_id": session_id, "deleted_at": {"$exists": False}},
+        tombstone,
+        projection={"_id": 1},
+    )
+    result = await collection.delete_many({"session_id": session_id})
+    if previous is None:
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+        # Messages without a live session document still get a tombstone.
+        await sessions_collection.update_one({"session_id": session_id}, tombstone, upsert=True)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -252,80 +300,156 @@ async def delete_session(session_id: str) -> Response:
     response_model=ChatSessionSummary,
 )
 async def update_session(session_id: str, payload: ChatSessionUpdate) -> ChatSessionSummary:
-    sessions_collection = get_sessions_collection()
-    messages_collection = get_messages_collection()
-
-    def _update() -> dict[str, Any] | None:
-        result = sessions_collection.find_one_and_update(
-            {"session_id": session_id},
-            {
-                "$set": {
-                    "title": payload.title,
-                    "updated_at": datetime.now(timezone.utc),
-                }
-            },
-            upsert=True,
-            return_document=ReturnDocument.AFTER,
-        )
-        return result
+    sessions_collection = get_async_sessions_collection()
+
+    metadata = await sessions_collection.find_one_and_update(
+        {"session_id": session_id, "message_count": {"$gt": 0}},
+        {
+            "$set": {
+                "title": payload.title,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        },
+        projection=_SESSION_SUMMARY_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+    summary = _session_summary(metadata) if metadata is not None else None
+    if summary is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+    return summary
+
+
+def _exchange_documents(
+    *,
+    session_id: str,
+    question: str,
+    answer: str,
+    sources: list[ChatSource],
+    metadata: dict[str, Any],
+) -> tuple[list[dict], datetime]:
+    """
+    Build the user and assistant message documents; returns them with the assistant timestamp.
+    """
+    user_created_at = datetime.now(timezone.utc)
+    # Ensure assistant timestamp is after user timestamp
+    assistant_created_at = user_created_at + timedelta(microseconds=1)
 
-    metadata = await run_in_threadpool(_update)
+    user_document = {
+        "session_id": session_id,
+        "role": "user",
+        "content": question,
+        "sources": [],
+        "created_at": user_created_at,
+    }
+    assistant_document = {
+        "session_id": session_id,
+        "role": "assistant",
+        "content": answer,
+        "sources": [source.model_dump(exclude_none=True) for source in sources],
+        "metadata": metadata,
+        "created_at": assistant_created_at,
+    }
+    return [user_document, assistant_document], assistant_created_at
 
-    if metadata is None:
-        metadata = {
-            "session_id": session_id,
-            "title": payload.title,
-        }
 
-    def _last_message() -> dict[str, Any] | None:
-        cursor = (
-            messages_collection.find({"session_id": session_id})
-            .sort("created_at", -1)
-            .limit(1)
+async def _persist_exchange(session_id: str, documents: list[dict]) -> None:
+    """
+    Store an exchange built by `_exchange_documents`; runs after the response is sent.
+    """
+    try:
+        await _insert_messages(documents)
+        recorded = await _record_exchange(
+            session_id,
+            message_count=len(documents),
+            last_message=documents[-1],
+            default_title="New Conversation",
         )
-        results = list(cursor)
-        return results[0] if results else None
-
-    last_message = await run_in_threadpool(_last_message)
-    if last_message is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found.")
+        if not recorded:
+            # The session was deleted while this exchange was pending; drop what was inserted.
+            await get_async_messages_collection().delete_many({"session_id": session_id})
+    except Exception:  # pragma: no cover - the response has already been sent
+        logger.exception("Failed to persist chat exchange for session %s", session_id)
+
+
+@dataclass(slots=True)
+class _PreparedChat:
+    """
+    Everything the chat endpoints need once retrieval (or a cache hit) is done.
+    """
+
+    session_id: str
+    model_name: str
+    semantic_cache: SemanticCache | None
+    cached: CachedAnswer | None = None
+    cache_latency_ms: float = 0.0
+    query_vector: list[float] | None = None
+    prompt: str = ""
+    options: dict[str, Any] | None = None
+    sources: list[ChatSource] = field(default_factory=list)
+
+
+async def _prepare_chat(request: ChatRequest) -> _PreparedChat:
+    """
+    Resolve the semantic cache, retrieve context, and build the generation prompt.
+    """
+    settings = get_settings()
 
-    message_count = await run_in_threadpool(
-        lambda: messages_collection.count_documents({"session_id": session_id})
+    # Prepare helper services
+    retriever = get_query_retriever()
+    prompt_builder = get_prompt_builder()
+
+    # Cached answers ignore conversation history, so only stand-alone questions use the cache.
+    prepared = _PreparedChat(
+        session_id=request.session_id or str(uuid4()),
+        model_name=request.model or settings.ollama_model,
+        semantic_cache=get_semantic_cache() if settings.semantic_cache_enabled and not request.history else None,
     )
 
-    return ChatSessionSummary(
-        session_id=session_id,
-        title=metadata.get("title"),
-        message_count=message_count,
-        last_message_at=last_message.get("created_at"),
-        last_message_role=last_message.get("role"),
-        last_message_preview=last_message.get("content"),
+    if prepared.semantic_cache is not None:
+        start_time = perf_counter()
+        try:
+            prepared.query_vector = await retriever.aembed(request.message)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except Exception as exc:  # pragma: no cover - defensive
+            raise HTTPException(
+                status_code=502,
+                detail="Failed to retrieve relevant context.",
+            ) from exc
+
+        try:
+            cached = await prepared.semantic_cache.lookup(prepared.query_vector, model=prepared.model_name)
+        except Exception:  # pragma: no cover - the cache must never fail a request
+            logger.exception("Semantic cache lookup failed")
+            cached = None
+
+        if cached is not None:
+            prepared.cached = cached
+            prepared.sources = [ChatSource(**source) for source in cached.sources]
+            prepared.cache_latency_ms = (perf_counter() - start_time) * 1000.0
+            return prepared
+
+    # Retrieve contextual chunks on the loop via the batcher and the async Qdrant client.
+    # A vector computed for the cache lookup is reused instead of embedding again.
+    retrieval_task = asyncio.ensure_future(
+        retriever.asearch(
+            request.message,
+            query_vector=prepared.query_vector,
+            limit=request.top_k,
+            with_vectors=False,
+            score_threshold=settings.retriever_score_threshold,
+            payload_fields=_CONTEXT_PAYLOAD_FIELDS,
+        )
     )
 
+    # The history part of the prompt does not depend on retrieval, so render it meanwhile.
+    history_turns = [
+        ChatTurn(role=turn.role, content=turn.content) for turn in request.history
+    ]
+    formatted_history = prompt_builder.format_history(history_turns)
 
-@router.post(
-    "/",
-    summary="Chat with the RAG assistant",
-    response_model=ChatResponse,
-)
-async def chat(request: ChatRequest) -> ChatResponse:
-    settings = get_settings()
-
-    # Prepare helper services
-    retriever = QueryRetriever()
-    prompt_builder = PromptBuilder()
-
-    # Retrieve contextual chunks (embedding runs in threadpool to avoid blocking the loop)
     try:
-        retrieved_chunks = await run_in_threadpool(
-            lambda: retriever.search(
-                request.message,
-                limit=request.top_k,
-                with_vectors=False,
-                score_threshold=settings.retriever_score_threshold,
-            )
-        )
+        retrieval = await retrieval_task
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - defensive
@@ -334,34 +458,113 @@ async def chat(request: ChatRequest) -> ChatResponse:
             detail="Failed to retrieve relevant context.",
         ) from exc
 
-    contexts = _extract_contexts(retrieved_chunks)
-    sources = _build_sources(retrieved_chunks) if contexts else []
-
-    history_turns = [
-        ChatTurn(role=turn.role, content=turn.content) for turn in request.history
-    ]
+    contexts, prepared.sources = _assemble_context(retrieval.chunks)
+    prepared.query_vector = retrieval.query_vector
 
-    prompt = prompt_builder.build_prompt(
+    prepared.prompt = prompt_builder.build_prompt(
         question=request.message,
         contexts=contexts,
-        history=history_turns,
+        formatted_history=formatted_history,
         general_knowledge=not bool(contexts),
     )
 
-    model_name = request.model or settings.ollama_model
-    options = {}
     if request.temperature is not None:
-        options["temperature"] = request.temperature
+        prepared.options = {"temperature": request.temperature}
+    return prepared
+
+
+def _cached_exchange(
+    prepared: _PreparedChat,
+    request: ChatRequest,
+    cached: CachedAnswer,
+) -> tuple[list[dict], datetime]:
+    """
+    Build the message documents for an answer served from the semantic cache.
+    """
+    return _exchange_documents(
+        session_id=prepared.session_id,
+        question=request.message,
+        answer=cached.answer,
+        sources=prepared.sources,
+        metadata={
+            "model": prepared.model_name,
+            "latency_ms": prepared.cache_latency_ms,
+            "retrieved": len(prepared.sources),
+            "cache_score": cached.score,
+        },
+    )
+
+
+def _generated_exchange(
+    prepared: _PreparedChat,
+    request: ChatRequest,
+    answer: str,
+    latency_ms: float,
+) -> tuple[list[dict], datetime]:
+    """
+    Build the message documents for a freshly generated answer.
+    """
+    return _exchange_documents(
+        session_id=prepared.session_id,
+        question=request.message,
+        answer=answer,
+        sources=prepared.sources,
+        metadata={
+            "model": prepared.model_name,
+            "latency_ms": latency_ms,
+            "retrieved": len(prepared.sources),
+        },
+    )
+
+
+async def _store_in_semantic_cache(prepared: _PreparedChat, request: ChatRequest, answer: str) -> None:
+    if prepared.semantic_cache is None or prepared.query_vector is None:
+        return
+    try:
+        await prepared.semantic_cache.store(
+            prepared.query_vector,
+            question=request.message,
+            answer=answer,
+            sources=[source.model_dump(exclude_none=True) for source in prepared.sources],
+            model=prepared.model_name,
+            session_id=prepared.session_id,
+        )
+    except Exception:  # pragma: no cover - the cache must never fail a request
+        logger.exception("Failed to store answer in the semantic cache")
+
+
+def _sse_event(data: dict[str, Any]) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+
+@router.post(
+    "/",
+    summary="Chat with the RAG assistant",
+    response_model=ChatResponse,
+)
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks) -> ChatResponse:
+    prepared = await _prepare_chat(request)
+
+    cached = prepared.cached
+    if cached is not None:
+        documents, created_at = _cached_exchange(prepared, request, cached)
+        background_tasks.add_task(_persist_exchange, prepared.session_id, documents)
+        return ChatResponse(
+            session_id=prepared.session_id,
+            answer=cached.answer,
+            sources=prepared.sources,
+            latency_ms=prepared.cache_latency_ms,
+            created_at=created_at,
+        )
 
     start_time = perf_counter()
 
     try:
-        async with OllamaClient() as client:
-            generation = await client.generate(
-                model=model_name,
-                prompt=prompt,
-                options=options or None,
-            )
+        generation = await get_ollama_client().generate(
+            model=prepared.model_name,
+            prompt=prepared.prompt,
+            options=prepared.options,
+        )
     except httpx.HTTPStatusError as exc:
         raise HTTPException(
             status_code=502,
@@ -372,48 +575,122 @@ async def chat(request: ChatRequest) -> ChatResponse:
             status_code=502,
             detail="Failed to reach Ollama service.",
         ) from exc
+    except OllamaError as exc:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Ollama returned an error: {exc}",
+        ) from exc
 
     answer = generation.response.strip()
+    generated = bool(answer)
     if not answer:
-        answer = "I'm sorry, I wasn't able to generate a response."
+        answer = _EMPTY_ANSWER
 
     latency_ms = (perf_counter() - start_time) * 1000.0
 
-    session_id = request.session_id or str(uuid4())
-    user_created_at = datetime.now(timezone.utc)
-    # Ensure assistant timestamp is after user timestamp
-    assistant_created_at = user_created_at + timedelta(microseconds=1)
-
-    user_document = {
-        "session_id": session_id,
-        "role": "user",
-        "content": request.message,
-        "sources": [],
-        "created_at": user_created_at,
-    }
-    assistant_document = {
-        "session_id": session_id,
-        "role": "assistant",
-        "content": answer,
-        "sources": [source.model_dump() for source in sources] if contexts else [],
-        "metadata": {
-            "model": model_name,
-            "latency_ms": latency_ms,
-            "retrieved": len(sources),
-        },
-        "created_at": assistant_created_at,
-    }
-    await _insert_messages([user_document, assistant_document])
-    await _ensure_session_metadata(
-        session_id=session_id,
-        created_at=assistant_document["created_at"],
-        default_title="New Conversation",
-    )
+    # Persisting and caching do not change the response, so the writes run after it is sent.
+    documents, created_at = _generated_exchange(prepared, request, answer, latency_ms)
+    background_tasks.add_task(_persist_exchange, prepared.session_id, documents)
+    if generated:
+        background_tasks.add_task(_store_in_semantic_cache, prepared, request, answer)
 
     return ChatResponse(
-        session_id=session_id,
+        session_id=prepared.session_id,
         answer=answer,
-        sources=sources,
+        sources=prepared.sources,
         latency_ms=latency_ms,
-        created_at=assistant_document["created_at"],
-    )
\ No newline at end of file
+        created_at=created_at,
+    )
+
+
+@router.post(
+    "/stream",
+    summary="Chat with the RAG assistant, streaming the answer as server-sent events.",
+    response_class=StreamingResponse,
+)
+async def chat_stream(request: ChatRequest, background_tasks: BackgroundTasks) -> StreamingResponse:
+    """
+    Stream the answer token by token instead of waiting for the full generation.
+
+    Each event is a JSON object: `{"token": ...}` for every text fragment, then a final
+    `{"done": true, ...}` carrying the same fields as `ChatResponse` minus the answer.
+    Failures after streaming has started are reported as `{"error": ...}`.
+
+    The exchange is queued for persistence once the answer is complete and written as a
+    background task after the body. A client that disconnects before generation finishes
+    cancels the stream, and the partial exchange is not saved.
+    """
+    # Retrieval errors still surface as regular HTTP errors before the stream opens.
+    prepared = await _prepare_chat(request)
+
+    async def _events() -> AsyncIterator[str]:
+        cached = prepared.cached
+        if cached is not None:
+            documents, created_at = _cached_exchange(prepared, request, cached)
+            background_tasks.add_task(_persist_exchange, prepared.session_id, documents)
+            yield _sse_event({"token": cached.answer})
+            yield _sse_event(
+                {
+                    "done": True,
+                    "session_id": prepared.session_id,
+                    "sources": [source.model_dump(mode="json") for source in prepared.sources],
+                    "latency_ms": prepared.cache_latency_ms,
+                    "created_at": created_at.isoformat(),
+                }
+            )
+            return
+
+        start_time = perf_counter()
+        fragments: list[str] = []
+        try:
+            async for chunk in get_ollama_client().generate_stream(
+                model=prepared.model_name,
+                prompt=prepared.prompt,
+                options=prepared.options,
+            ):
+                if chunk.response:
+                    fragments.append(chunk.response)
+                    yield _sse_event({"token": chunk.response})
+                if chunk.done:
+                    break
+        except httpx.HTTPStatusError as exc:
+            yield _sse_event({"error": f"Ollama returned an error: {exc.response.text}"})
+            return
+        except httpx.HTTPError:
+            yield _sse_event({"error": "Failed to reach Ollama service."})
+            return
+        except OllamaError as exc:
+            yield _sse_event({"error": f"Ollama returned an error: {exc}"})
+            return
+
+        answer = "".join(fragments).strip()
+        generated = bool(answer)
+        if not answer:
+            answer = _EMPTY_ANSWER
+
+        latency_ms = (perf_counter() - start_time) * 1000.0
+        documents, created_at = _generated_exchange(prepared, request, answer, latency_ms)
+        background_tasks.add_task(_persist_exchange, prepared.session_id, documents)
+        if generated:
+            background_tasks.add_task(_store_in_semantic_cache, prepared, request, answer)
+
+        if not generated:
+            yield _sse_event({"token": answer})
+        yield _sse_event(
+            {
+                "done": True,
+                "session_id": prepared.session_id,
+                "sources": [source.model_dump(mode="json") for source in prepared.sources],
+                "latency_ms": latency_ms,
+                "created_at": created_at.isoformat(),
+            }
+        )
+
+    # Tasks queued while streaming still run: Starlette awaits the response's background
+    # after the body finishes or the client goes away.
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks,
+    )
@@ -8,7 +8,7 @@ from app.models import (
     WikipediaIngestResponse,
     WikipediaUrlIngestRequest,
 )
-from app.services import WikipediaIngestor
+from app.services import WikipediaIngestor, get_query_retriever
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -35,6 +35,8 @@ async def ingest_wikipedia(request: WikipediaIngestRequest) -> WikipediaIngestRe
             detail=f"Failed to ingest Wikipedia content: {exc}",
         ) from exc
 
+    if not request.dry_run:
+        get_query_retriever().clear_cache()
     return result
 
 
@@ -61,4 +63,6 @@ async def ingest_wikipedia_by_url(request: WikipediaUrlIngestRequest) -> Wikiped
             detail=f"Failed to ingest Wikipedia content: {exc}",
         ) from exc
 
+    if not request.dry_run:
+        get_query_retriever().clear_cache()
     return result
\ No newline at end of file
@@ -9,10 +9,17 @@ from starlette import status
 from app.core.settings import get_settings
 from app.db.qdrant import get_qdrant_client
 from app.models import KnowledgeReference
+from app.services import get_query_retriever
 from qdrant_client.http import models as rest
 
 router = APIRouter()
 
+# Filters are validated pydantic models; build them once instead of on every request.
+_FIRST_CHUNK_FILTER = rest.Filter(
+    must=[rest.FieldCondition(key="chunk_index", match=rest.MatchValue(value=0))]
+)
+_REFERENCE_PAYLOAD = rest.PayloadSelectorInclude(include=["page_id", "title", "topic", "url"])
+
 
 @router.get(
     "/references",
@@ -24,44 +31,50 @@ async def list_references() -> List[KnowledgeReference]:
     client = get_qdrant_client()
 
     def _collect() -> List[Dict[str, Any]]:
+        # Every article has exactly one chunk with index 0, so filtering on it yields one
+        # point per reference instead of paging through every chunk in the collection.
         references: Dict[int, Dict[str, Any]] = {}
         offset = None
 
         while True:
             points, next_offset = client.scroll(
                 collection_name=settings.collection_name,
+                scroll_filter=_FIRST_CHUNK_FILTER,
                 limit=256,
-                with_payload=True,
+                with_payload=_REFERENCE_PAYLOAD,
                 with_vectors=False,
                 offset=offset,
             )
-            if not points:
-                break
-
             for point in points:
                 payload = point.payload or {}
                 page_id = payload.get("page_id")
                 if page_id is None:
                     continue
-
-                reference = references.get(page_id)
-                if reference is None:
-                    reference = {
-                        "page_id": page_id,
-                        "title": payload.get("title"),
-                        "topic": payload.get("topic"),
-                        "url": payload.get("url"),
-                        "chunk_count": 0,
-                    }
-                    references[page_id] = reference
-
-                reference["chunk_count"] += 1
+                references[page_id] = {
+                    "page_id": page_id,
+                    "title": payload.get("title"),
+                    "topic": payload.get("topic"),
+                    "url": payload.get("url"),
+                    "chunk_count": 0,
+                }
 
             if next_offset is None:
                 break
-
             offset = next_offset
 
+        if references:
+            # Chunk counts per page are aggregated by Qdrant over the page_id payload index.
+            facets = client.facet(
+                collection_name=settings.collection_name,
+                key="page_id",
+                limit=len(references),
+                exact=True,
+            )
+            for hit in facets.hits:
+                reference = references.get(hit.value)
+                if reference is not None:
+                    reference["chunk_count"] = hit.count
+
         return sorted(
             references.values(),
             key=lambda ref: (str(ref.get("title") or "")).lower(),
@@ -89,16 +102,18 @@ async def delete_reference(page_id: int) -> Response:
         ]
     )
 
-    def _count() -> int:
-        result = client.count(
+    def _exists() -> bool:
+        # A single-point scroll answers "any match?" without the full scan an exact count needs.
+        points, _ = client.scroll(
             collection_name=settings.collection_name,
-            exact=True,
-            count_filter=filter_,
+            scroll_filter=filter_,
+            limit=1,
+            with_payload=False,
+            with_vectors=False,
         )
-        return result.count
+        return bool(points)
 
-    existing = await run_in_threadpool(_count)
-    if existing == 0:
+    if not await run_in_threadpool(_exists):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reference not found.")
 
     def _delete() -> None:
@@ -109,6 +124,7 @@ async def delete_reference(page_id: int) -> Response:
         )
 
     await run_in_threadpool(_delete)
+    get_query_retriever().clear_cache()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -1,15 +1,33 @@
-from .ingest_wikipedia import WikipediaIngestor
-from .ollama import OllamaClient, OllamaGenerationResult
-from .prompts import ChatTurn, PromptBuilder
-from .retrieval import QueryRetriever, RetrievedChunk
+from .ingest_wikipedia import WikipediaIngestor, close_wikipedia_session, get_wikipedia_session
+from .ollama import (
+    OllamaClient,
+    OllamaError,
+    OllamaGenerationResult,
+    close_ollama_client,
+    get_ollama_client,
+)
+from .prompts import ChatTurn, PromptBuilder, get_prompt_builder
+from .retrieval import QueryRetriever, RetrievalResult, RetrievedChunk, get_query_retriever
+from .semantic_cache import CachedAnswer, SemanticCache, get_semantic_cache
 
 __all__ = [
     "WikipediaIngestor",
+    "close_wikipedia_session",
+    "get_wikipedia_session",
     "OllamaClient",
+    "OllamaError",
     "OllamaGenerationResult",
+    "close_ollama_client",
+    "get_ollama_client",
     "PromptBuilder",
     "ChatTurn",
+    "get_prompt_builder",
     "QueryRetriever",
+    "RetrievalResult",
     "RetrievedChunk",
+    "get_query_retriever",
+    "CachedAnswer",
+    "SemanticCache",
+    "get_semantic_cache",
 ]
 
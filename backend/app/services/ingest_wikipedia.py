@@ -3,13 +3,21 @@ Utilities to fetch, clean, chunk, embed, and upsert Wikipedia content.
 """
 from __future__ import annotations
 
+import hashlib
 import logging
 import re
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence
+from typing import Callable, Iterable, Iterator, List, Sequence
 from urllib.parse import unquote, urlparse
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as rest
 
@@ -25,6 +33,57 @@ from app.models import (
 logger = logging.getLogger(__name__)
 
 
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Upper bound on concurrent MediaWiki requests per ingest run.
+_FETCH_WORKERS = 8
+
+_session: requests.Session | None = None
+
+# Bulk loads share one `m=0` window per process: the first one in disables the graph and
+# the last one out restores the `m` recorded on entry.
+_bulk_load_lock = threading.Lock()
+_bulk_load_count = 0
+_bulk_load_restore_m: int | None = None
+
+
+def get_wikipedia_session() -> requests.Session:
+    """
+    Return the shared HTTP session used for MediaWiki API calls, creating it on first use.
+
+    Sharing one session keeps TLS connections to Wikipedia alive across ingest runs, and
+    transient 429/5xx responses are retried with backoff before surfacing as errors.
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        session.headers.update({"User-Agent": _USER_AGENT})
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+            ),
+        )
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def close_wikipedia_session() -> None:
+    """Close the shared MediaWiki HTTP session."""
+    global _session
+    if _session is not None:
+        _session.close()
+    _session = None
+
+
 @dataclass(slots=True)
 class WikiPage:
     """
@@ -47,16 +106,11 @@ class WikipediaFetcher:
 
     def __init__(self, *, language: str, session: requests.Session | None = None):
         self.language = language
-        self.session = session or requests.Session()
-        self.session.headers.update(
-            {
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) "
-                    "Chrome/120.0.0.0 Safari/537.36"
-                )
-            }
-        )
+        if session is None:
+            self.session = get_wikipedia_session()
+        else:
+            self.session = session
+            self.session.headers.update({"User-Agent": _USER_AGENT})
 
     def search(self, topic: str, *, limit: int) -> list[WikiPage]:
         """
@@ -128,6 +182,12 @@ class WikipediaFetcher:
         return page
 
 
+# Applied in this order: dropping a citation can leave a newline run that the second
+# pattern then collapses, so the two are not fused into one alternation.
+_CITATION_PATTERN = re.compile(r"\[\d+]")
+_NEWLINE_RUN_PATTERN = re.compile(r"\n{3,}")
+
+
 def _clean_text(text: str) -> str:
     """
     Normalize raw extracts: remove citation markers, trim whitespace, compress newlines.
@@ -135,8 +195,8 @@ def _clean_text(text: str) -> str:
     if not text:
         return ""
 
-    without_refs = re.sub(r"\[\d+]", "", text)
-    condensed_newlines = re.sub(r"\n{3,}", "\n\n", without_refs)
+    without_refs = _CITATION_PATTERN.sub("", text)
+    condensed_newlines = _NEWLINE_RUN_PATTERN.sub("\n\n", without_refs)
     stripped = condensed_newlines.strip()
     return stripped
 
@@ -155,49 +215,67 @@ def _chunk_text(content: str, *, chunk_size: int, overlap: int) -> list[str]:
     step = chunk_size - overlap
     chunks: list[str] = []
     for start in range(0, len(words), step):
-        chunk_words = words[start : start + chunk_size]
-        if not chunk_words:
+        end = start + chunk_size
+        chunks.append(" ".join(words[start:end]))
+        # Any later window would only repeat words already covered by this one.
+        if end >= len(words):
             break
-        chunk = " ".join(chunk_words)
-        chunks.append(chunk)
     return chunks
 
 
-def _build_points(
+_POINT_NAMESPACE = uuid.NAMESPACE_DNS.bytes
+
+
+def _point_id(page_id: int, chunk_index: int) -> str:
+    """
+    Generate a stable UUID from page_id and chunk index.
+
+    Equivalent to `uuid.uuid5(uuid.NAMESPACE_DNS, f"{page_id}:{chunk_index}")`, with the
+    namespace bytes resolved once instead of on every call.
+    """
+    digest = hashlib.sha1(_POINT_NAMESPACE + f"{page_id}:{chunk_index}".encode()).digest()
+    return str(uuid.UUID(bytes=digest[:16], version=5))
+
+
+def _content_hash(model_name: str, chunk: str) -> str:
+    """
+    Fingerprint a chunk together with the model that embeds it.
+
+    Including the model name means switching embedding models never reuses a vector
+    produced by the previous one.
+    """
+    return hashlib.blake2b(f"{model_name}\0{chunk}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _build_point(
     page: WikiPage,
+    chunk_index: int,
+    chunk: str,
     *,
-    chunks: Sequence[str],
-    embeddings: Sequence[Sequence[float]],
-) -> list[rest.PointStruct]:
+    point_id: str,
+    vector: list[float],
+    content_hash: str,
+) -> rest.PointStruct:
     """
-    Convert chunk embeddings into Qdrant point payloads.
+    Convert one chunk embedding into a Qdrant point.
     """
-    if len(chunks) != len(embeddings):
-        raise ValueError("Number of embeddings must match number of chunks.")
-
-    points: list[rest.PointStruct] = []
-    for idx, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-        payload = {
-            "source": "wikipedia",
-            "topic": page.topic,
-            "title": page.title,
-            "url": page.url,
-            "chunk_index": idx,
-            "word_count": len(chunk.split()),
-            "page_id": page.page_id,
-            "content": chunk,
-        }
-        # Generate a stable UUID from page_id and chunk index
-        import uuid
-        point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{page.page_id}:{idx}"))
-        points.append(
-            rest.PointStruct(
-                id=point_id,
-                vector=list(embedding),
-                payload=payload,
-            )
-        )
-    return points
+    payload = {
+        "source": "wikipedia",
+        "topic": page.topic,
+        "title": page.title,
+        "url": page.url,
+        "chunk_index": chunk_index,
+        # Chunks are words joined by single spaces, so counting separators avoids re-splitting.
+        "word_count": chunk.count(" ") + 1,
+        "page_id": page.page_id,
+        "content": chunk,
+        "content_hash": content_hash,
+    }
+    return rest.PointStruct(
+        id=point_id,
+        vector=vector,
+        payload=payload,
+    )
 
 
 class WikipediaIngestor:
@@ -225,29 +303,33 @@ class WikipediaIngestor:
         )
 
         self.fetcher = WikipediaFetcher(language=request.language)
-        processed_pages = 0
-        embedded_chunks = 0
-        skipped_pages = 0
-
-        processed_topics: list[str] = []
-        for topic in request.topics:
-            pages = self.fetcher.search(topic, limit=request.max_pages_per_topic)
-            if not pages:
-                logger.warning("No pages found for topic '%s'", topic)
-                continue
 
-            topic_processed, topic_embedded, topic_skipped = self._process_pages(
+        # Gather every topic's pages first so their chunks share embedding batches. The
+        # searches are independent network calls, so they run concurrently.
+        fetcher = self.fetcher
+        pages: list[WikiPage] = []
+        with ThreadPoolExecutor(max_workers=min(_FETCH_WORKERS, len(request.topics))) as pool:
+            topic_results = pool.map(
+                lambda topic: fetcher.search(topic, limit=request.max_pages_per_topic),
+                request.topics,
+            )
+            for topic, topic_pages in zip(request.topics, topic_results):
+                if not topic_pages:
+                    logger.warning("No pages found for topic '%s'", topic)
+                    continue
+                pages.extend(topic_pages)
+
+        with self._deferred_indexing(enabled=request.bulk_mode and not request.dry_run):
+            processed, embedded_chunks, skipped_pages = self._process_pages(
                 pages,
                 chunk_size=request.chunk_size,
                 chunk_overlap=request.chunk_overlap,
+                embedding_chunk_size=request.embedding_chunk_size,
                 dry_run=request.dry_run,
             )
-            if topic_processed or topic_embedded:
-                processed_topics.append(topic)
-
-            processed_pages += topic_processed
-            embedded_chunks += topic_embedded
-            skipped_pages += topic_skipped
+        processed_pages = len(processed)
+        processed_topic_names = {page.topic for page in processed}
+        processed_topics = [topic for topic in request.topics if topic in processed_topic_names]
 
         logger.info(
             "Finished Wikipedia ingestion processed_pages=%s embedded_chunks=%s skipped_pages=%s dry_run=%s",
@@ -276,35 +358,36 @@ class WikipediaIngestor:
         )
 
         self.fetcher = WikipediaFetcher(language=request.language)
-        processed_pages = 0
-        embedded_chunks = 0
-        skipped_pages = 0
-        processed_identifiers: list[str] = []
 
+        titles: list[tuple[str, str]] = []
         for url in request.urls:
             title = _title_from_url(url)
             if title is None:
                 logger.warning("Unable to determine Wikipedia title from URL '%s'; skipping", url)
                 continue
-
-            page = self.fetcher.fetch_single_page(title, topic=title)
-            if page is None:
-                logger.warning("No page found for Wikipedia URL '%s'", url)
-                continue
-
-            page_processed, page_embedded, page_skipped = self._process_pages(
-                [page],
+            titles.append((url, title))
+
+        fetcher = self.fetcher
+        pages: list[WikiPage] = []
+        if titles:
+            with ThreadPoolExecutor(max_workers=min(_FETCH_WORKERS, len(titles))) as pool:
+                fetched = pool.map(lambda item: fetcher.fetch_single_page(item[1], topic=item[1]), titles)
+                for (url, _), page in zip(titles, fetched):
+                    if page is None:
+                        logger.warning("No page found for Wikipedia URL '%s'", url)
+                        continue
+                    pages.append(page)
+
+        with self._deferred_indexing(enabled=request.bulk_mode and not request.dry_run):
+            processed, embedded_chunks, skipped_pages = self._process_pages(
+                pages,
                 chunk_size=request.chunk_size,
                 chunk_overlap=request.chunk_overlap,
+                embedding_chunk_size=request.embedding_chunk_size,
                 dry_run=request.dry_run,
             )
-
-            if page_processed:
-                processed_identifiers.append(page.title)
-
-            processed_pages += page_processed
-            embedded_chunks += page_embedded
-            skipped_pages += page_skipped
+        processed_pages = len(processed)
+        processed_identifiers = [page.title for page in processed]
 
         logger.info(
             "Finished Wikipedia URL ingestion processed_pages=%s embedded_chunks=%s skipped_pages=%s dry_run=%s",
@@ -322,31 +405,149 @@ class WikipediaIngestor:
             dry_run=request.dry_run,
         )
 
-    def _upsert_points(self, points: Iterable[rest.PointStruct]) -> None:
+    @contextmanager
+    def _deferred_indexing(self, *, enabled: bool) -> Iterator[None]:
         """
-        Upsert prepared points into Qdrant.
+        Disable HNSW graph construction for the duration of a bulk load.
+
+        With `m=0` Qdrant stores points without linking them into the graph; restoring
+        the previous `m` afterwards builds the index once in a single optimizer pass
+        instead of updating it on every upsert.
+
+        Overlapping bulk loads are reference counted so only the last one restores `m`,
+        and a collection already reporting `m=0` (e.g. after an interrupted run) is
+        restored to `qdrant_hnsw_m` rather than left without a graph.
         """
-        points = list(points)
-        if not points:
+        global _bulk_load_count, _bulk_load_restore_m
+        if not enabled:
+            yield
             return
 
+        collection_name = self.settings.collection_name
+        with _bulk_load_lock:
+            if _bulk_load_count == 0:
+                info = self.qdrant.get_collection(collection_name)
+                _bulk_load_restore_m = info.config.hnsw_config.m or self.settings.qdrant_hnsw_m
+                self.qdrant.update_collection(
+                    collection_name=collection_name,
+                    hnsw_config=rest.HnswConfigDiff(m=0),
+                )
+            _bulk_load_count += 1
+        try:
+            yield
+        finally:
+            with _bulk_load_lock:
+                _bulk_load_count -= 1
+                if _bulk_load_count == 0:
+                    self.qdrant.update_collection(
+                        collection_name=collection_name,
+                        hnsw_config=rest.HnswConfigDiff(m=_bulk_load_restore_m),
+                    )
+
+    @contextmanager
+    def _upsert_pipeline(self, *, enabled: bool) -> Iterator[Callable[[list[rest.PointStruct]], None]]:
+        """
+        Yield a `submit(points)` callable that upserts in the background.
+
+        Submitted points accumulate until a full shard of `qdrant_upsert_batch_size` is
+        ready, whatever the size of the embedding slices feeding it, and each shard goes to
+        a pool of `qdrant_upsert_concurrency` threads while the caller keeps embedding.
+        Shards are sent with `wait=False`; leaving the block waits for them, re-raising
+        the first failure, then sends the remainder with `wait=True` so the points are
+        applied before ingestion reports success.
+        """
+        if not enabled:
+            yield lambda points: None
+            return
+
+        batch_size = self.settings.qdrant_upsert_batch_size
+        buffer: list[rest.PointStruct] = []
+        futures: list[Future[None]] = []
+        with ThreadPoolExecutor(
+            max_workers=self.settings.qdrant_upsert_concurrency,
+            thread_name_prefix="qdrant-upsert",
+        ) as pool:
+
+            def submit(points: list[rest.PointStruct]) -> None:
+                buffer.extend(points)
+                # Hold back at least one point so the final shard is the one sent with wait=True.
+                while len(buffer) > batch_size:
+                    shard = buffer[:batch_size]
+                    del buffer[:batch_size]
+                    futures.append(pool.submit(self._upsert_batch, shard, wait=False))
+
+            yield submit
+            for future in futures:
+                future.result()
+
+        # Updates are applied in order, so waiting on the last one covers the shards above.
+        if buffer:
+            self._upsert_batch(buffer, wait=True)
+
+    def _upsert_batch(self, batch: list[rest.PointStruct], *, wait: bool) -> None:
         self.qdrant.upsert(
             collection_name=self.settings.collection_name,
-            wait=True,
-            points=points,
+            wait=wait,
+            points=batch,
         )
 
+    @staticmethod
+    def _embed_slices(
+        chunks: Sequence[str],
+        positions: Sequence[int],
+        *,
+        embedding_chunk_size: int,
+    ) -> Iterator[tuple[list[int], np.ndarray]]:
+        """
+        Embed `chunks[position]` for each position in slices of `embedding_chunk_size`.
+
+        Chunks are embedded shortest first so each slice holds similarly sized texts and
+        pads little; every slice is yielded with the positions its rows belong to.
+        """
+        order = sorted(positions, key=lambda position: len(chunks[position]))
+        for start in range(0, len(order), embedding_chunk_size):
+            batch = order[start : start + embedding_chunk_size]
+            yield batch, embed_documents([chunks[position] for position in batch])
+
+    def _stored_vectors(self, point_ids: Sequence[str], content_hashes: Sequence[str]) -> dict[int, list[float]]:
+        """
+        Return vectors already stored for chunks whose content hash is unchanged, by chunk position.
+        """
+        positions = {point_id: position for position, point_id in enumerate(point_ids)}
+        batch_size = self.settings.qdrant_upsert_batch_size
+        stored: dict[int, list[float]] = {}
+        for start in range(0, len(point_ids), batch_size):
+            records = self.qdrant.retrieve(
+                collection_name=self.settings.collection_name,
+                ids=list(point_ids[start : start + batch_size]),
+                with_payload=["content_hash"],
+                with_vectors=True,
+            )
+            for record in records:
+                position = positions.get(str(record.id))
+                if position is None or not isinstance(record.vector, list):
+                    continue
+                if (record.payload or {}).get("content_hash") == content_hashes[position]:
+                    stored[position] = record.vector
+        return stored
+
     def _process_pages(
         self,
         pages: Iterable[WikiPage],
         *,
         chunk_size: int,
         chunk_overlap: int,
+        embedding_chunk_size: int,
         dry_run: bool,
-    ) -> tuple[int, int, int]:
-        processed_pages = 0
-        embedded_chunks = 0
+    ) -> tuple[list[WikiPage], int, int]:
+        """
+        Chunk, embed, and upsert pages; returns the processed pages, chunk count, and skips.
+
+        Chunks from all pages share embedding batches instead of calling the model once
+        per page, and chunks whose stored content hash is unchanged are not re-embedded.
+        """
         skipped_pages = 0
+        chunked_pages: list[tuple[WikiPage, list[str]]] = []
 
         for page in pages:
             chunks = _chunk_text(
@@ -362,18 +563,75 @@ class WikipediaIngestor:
                     page.page_id,
                 )
                 continue
+            chunked_pages.append((page, chunks))
+
+        if not chunked_pages:
+            return [], 0, skipped_pages
+
+        model_name = self.settings.embed_model
+        entries = [(page, idx, chunk) for page, chunks in chunked_pages for idx, chunk in enumerate(chunks)]
+        chunk_texts = [chunk for _, _, chunk in entries]
+        point_ids = [_point_id(page.page_id, idx) for page, idx, _ in entries]
+        content_hashes = [_content_hash(model_name, chunk) for chunk in chunk_texts]
+
+        # A dry run must not depend on the vector store, so it embeds every chunk.
+        stored = {} if dry_run else self._stored_vectors(point_ids, content_hashes)
+        if stored:
+            logger.info("Reusing %s of %s stored chunk embeddings", len(stored), len(entries))
+        pending = [position for position in range(len(entries)) if position not in stored]
+
+        def build(position: int, vector: list[float]) -> rest.PointStruct:
+            page, idx, chunk = entries[position]
+            return _build_point(
+                page,
+                idx,
+                chunk,
+                point_id=point_ids[position],
+                vector=vector,
+                content_hash=content_hashes[position],
+            )
 
-            embeddings = embed_documents(chunks)
-            embedded_chunks += len(chunks)
-            processed_pages += 1
+        # Each embedded slice is handed to the upsert pool straight away, so Qdrant
+        # writes the previous slice while the model works on the next one.
+        with self._upsert_pipeline(enabled=not dry_run) as submit:
+            if stored:
+                submit([build(position, vector) for position, vector in stored.items()])
+            for positions, embeddings in self._embed_slices(
+                chunk_texts,
+                pending,
+                embedding_chunk_size=embedding_chunk_size,
+            ):
+                submit([build(position, row.tolist()) for position, row in zip(positions, embeddings)])
 
-            if dry_run:
-                continue
+        if not dry_run:
+            self._delete_stale_chunks(chunked_pages)
 
-            points = _build_points(page, chunks=chunks, embeddings=embeddings)
-            self._upsert_points(points)
+        return [page for page, _ in chunked_pages], len(entries), skipped_pages
 
-        return processed_pages, embedded_chunks, skipped_pages
+    def _delete_stale_chunks(self, chunked_pages: Sequence[tuple[WikiPage, list[str]]]) -> None:
+        """
+        Remove points left over from an earlier ingest that split a page into more chunks.
+
+        Upserts overwrite chunk indices `0..n-1` in place; anything at `n` or above would
+        otherwise keep surfacing in retrieval and in reference chunk counts.
+        """
+        self.qdrant.delete(
+            collection_name=self.settings.collection_name,
+            points_selector=rest.FilterSelector(
+                filter=rest.Filter(
+                    should=[
+                        rest.Filter(
+                            must=[
+                                rest.FieldCondition(key="page_id", match=rest.MatchValue(value=page.page_id)),
+                                rest.FieldCondition(key="chunk_index", range=rest.Range(gte=len(chunks))),
+                            ]
+                        )
+                        for page, chunks in chunked_pages
+                    ]
+                )
+            ),
+            wait=True,
+        )
 
 
 def _title_from_url(url: str) -> str | None:
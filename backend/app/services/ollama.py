@@ -3,14 +3,21 @@ Asynchronous client wrappers for interacting with a local Ollama server.
 """
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
-from typing import Any, Mapping
+from typing import Any, AsyncIterator, Mapping
 
 import httpx
 
 from app.core.settings import get_settings
 
 
+class OllamaError(RuntimeError):
+    """
+    Error reported by Ollama in a response body rather than through the HTTP status.
+    """
+
+
 @dataclass(slots=True)
 class OllamaGenerationResult:
     """
@@ -27,10 +34,11 @@ class OllamaGenerationResult:
 
     @classmethod
     def from_dict(cls, data: Mapping[str, Any]) -> "OllamaGenerationResult":
+        # Ollama always sends these three, already typed; only the metrics are optional.
         return cls(
-            model=str(data.get("model", "")),
-            response=str(data.get("response", "")),
-            done=bool(data.get("done", False)),
+            model=data["model"],
+            response=data["response"],
+            done=data["done"],
             total_duration=data.get("total_duration"),
             prompt_eval_count=data.get("prompt_eval_count"),
             eval_count=data.get("eval_count"),
@@ -48,6 +56,7 @@ class OllamaClient:
         *,
         base_url: str | None = None,
         timeout: float = 120.0,
+        limits: httpx.Limits | None = None,
         http_client: httpx.AsyncClient | None = None,
     ):
         settings = get_settings()
@@ -56,6 +65,7 @@ class OllamaClient:
         self._client = http_client or httpx.AsyncClient(
             base_url=self.base_url,
             timeout=timeout,
+            limits=limits or httpx.Limits(),
             headers={"Content-Type": "application/json"},
         )
 
@@ -94,18 +104,101 @@ class OllamaClient:
         options:
             Advanced Ollama generation options (temperature, top_p, etc.).
         """
+        payload = self._payload(
+            model=model,
+            prompt=prompt,
+            system_prompt=system_prompt,
+            options=options,
+            stream=False,
+        )
+        response = await self._client.post("/api/generate", json=payload)
+        response.raise_for_status()
+        return _parse_result(response.json())
+
+    async def generate_stream(
+        self,
+        *,
+        model: str,
+        prompt: str,
+        system_prompt: str | None = None,
+        options: Mapping[str, Any] | None = None,
+    ) -> AsyncIterator[OllamaGenerationResult]:
+        """
+        Issue a streaming completion request and yield each partial result as it arrives.
+
+        Every yielded result carries the next fragment of text in `response`; the final
+        one has `done` set and includes the generation statistics.
+        """
+        payload = self._payload(
+            model=model,
+            prompt=prompt,
+            system_prompt=system_prompt,
+            options=options,
+            stream=True,
+        )
+        async with self._client.stream("POST", "/api/generate", json=payload) as response:
+            if response.is_error:
+                await response.aread()
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                # Failures during generation arrive as an `{"error": ...}` line mid-stream.
+                yield _parse_result(json.loads(line))
+
+    @staticmethod
+    def _payload(
+        *,
+        model: str,
+        prompt: str,
+        system_prompt: str | None,
+        options: Mapping[str, Any] | None,
+        stream: bool,
+    ) -> dict[str, Any]:
         payload: dict[str, Any] = {
             "model": model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
         }
         if system_prompt:
             payload["system"] = system_prompt
         if options:
             payload["options"] = dict(options)
+        return payload
+
+
+def _parse_result(data: Mapping[str, Any]) -> OllamaGenerationResult:
+    if "error" in data:
+        raise OllamaError(str(data["error"]))
+    return OllamaGenerationResult.from_dict(data)
+
+
+_client: OllamaClient | None = None
+
+
+def get_ollama_client() -> OllamaClient:
+    """
+    Return the shared Ollama client, creating it on first use.
+
+    Reusing one client keeps a pool of keep-alive connections open to the Ollama
+    server, so chat requests skip the TCP handshake a fresh client would pay.
+    """
+    global _client
+    if _client is None:
+        settings = get_settings()
+        _client = OllamaClient(
+            timeout=settings.ollama_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.ollama_pool_size,
+                max_keepalive_connections=settings.ollama_keepalive_connections,
+            ),
+        )
+    return _client
 
-        response = await self._client.post("/api/generate", json=payload)
-        response.raise_for_status()
-        data = response.json()
-        return OllamaGenerationResult.from_dict(data)
 
+async def close_ollama_client() -> None:
+    """Close the shared Ollama client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
@@ -4,6 +4,7 @@ Utilities to assemble retrieval-augmented prompts for LLM generation.
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cache
 from typing import Iterable, Sequence
 
 
@@ -52,42 +53,58 @@ class PromptBuilder:
 
     @staticmethod
     def _format_context(contexts: Sequence[str]) -> str:
-        lines = []
-        for idx, snippet in enumerate(contexts, start=1):
-            lines.append(f"Context {idx}:\n{snippet.strip()}")
-        return "\n\n".join(lines)
+        return "\n\n".join(f"Context {idx}:\n{snippet.strip()}" for idx, snippet in enumerate(contexts, start=1))
 
     @staticmethod
     def _format_history(history: Iterable[ChatTurn]) -> str:
         return "\n".join(turn.formatted() for turn in history)
 
+    def format_history(self, history: Iterable[ChatTurn]) -> str:
+        """
+        Render conversation history the way `build_prompt` embeds it.
+        """
+        return self._format_history(history)
+
     def build_prompt(
         self,
         *,
         question: str,
         contexts: Sequence[str],
         history: Sequence[ChatTurn] | None = None,
+        formatted_history: str | None = None,
         general_knowledge: bool = False,
     ) -> str:
         """
         Produce a single prompt string suitable for Ollama's generate endpoint.
+
+        `formatted_history` takes the output of `format_history` for callers that
+        prepared it ahead of time; it is used in place of `history` when given.
+
+        Sections run from most to least stable: the system prompt and instructions,
+        then history that only grows within a session, then this turn's context and
+        question. Ollama reuses its KV cache for the longest prefix shared with the
+        previous request, so the fixed sections are never re-evaluated.
         """
-        sections = [f"System:\n{self.system_prompt}"]
+        instructions = (
+            self.general_knowledge_instructions if general_knowledge or not contexts else self.answer_instructions
+        )
+        sections = [f"System:\n{self.system_prompt}", f"Instructions:\n{instructions}"]
 
-        if history:
+        if formatted_history is None and history:
             formatted_history = self._format_history(history)
-            if formatted_history:
-                sections.append(f"Conversation History:\n{formatted_history}")
+        if formatted_history:
+            sections.append(f"Conversation History:\n{formatted_history}")
 
         if contexts:
             sections.append(f"Retrieved Context:\n{self._format_context(contexts)}")
 
-        instructions = (
-            self.general_knowledge_instructions if general_knowledge or not contexts else self.answer_instructions
-        )
-        sections.append(f"Instructions:\n{instructions}")
         sections.append(f"User Question:\n{question.strip()}")
         sections.append("Answer:")
 
         return "\n\n".join(sections)
 
+
+@cache
+def get_prompt_builder() -> PromptBuilder:
+    """Return the process-wide prompt builder with the default instructions."""
+    return PromptBuilder()
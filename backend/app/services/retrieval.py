@@ -3,15 +3,21 @@ Tools for embedding user queries and retrieving the closest chunks from Qdrant.
 """
 from __future__ import annotations
 
+import asyncio
+import threading
 from dataclasses import dataclass
-from typing import Any
+from functools import cache, lru_cache
+from typing import Any, Sequence
 
-from qdrant_client import QdrantClient
+from cachetools import TTLCache
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as rest
 
 from app.core.settings import get_settings
-from app.db.qdrant import get_qdrant_client
-from app.embeddings.model import embed_query
+from app.db.qdrant import get_async_qdrant_client, get_qdrant_client
+from app.embeddings.batcher import embed_query_batched
+from app.embeddings.cache import get_query_embedding_cache
+from app.embeddings.model import embed_query, encode
 
 
 @dataclass(slots=True)
@@ -27,24 +33,89 @@ class RetrievedChunk:
 
     @classmethod
     def from_scored_point(cls, point: rest.ScoredPoint) -> "RetrievedChunk":
-        payload = dict(point.payload or {})
-        vector = list(point.vector) if point.vector is not None else None
+        # The client hands back freshly decoded payload dicts and vector lists that nothing
+        # else references, so they are adopted as-is instead of copied.
+        vector = point.vector
         return cls(
             id=str(point.id),
-            score=float(point.score),
-            payload=payload,
-            vector=vector,
+            score=point.score,
+            payload=point.payload if point.payload is not None else {},
+            vector=vector if isinstance(vector, list) else None,
         )
 
+    @classmethod
+    def from_scored_points(cls, points: Sequence[rest.ScoredPoint]) -> list["RetrievedChunk"]:
+        from_scored_point = cls.from_scored_point
+        return [from_scored_point(point) for point in points]
+
+
+@dataclass(slots=True)
+class RetrievalResult:
+    """
+    Chunks returned for a query together with the embedding used to find them.
+    """
+
+    chunks: list[RetrievedChunk]
+    query_vector: list[float]
+
+
+def _payload_selector(payload_fields: Sequence[str] | None) -> bool | rest.PayloadSelectorInclude:
+    if payload_fields is None:
+        return True
+    return _include_selector(tuple(payload_fields))
+
+
+@lru_cache(maxsize=32)
+def _include_selector(payload_fields: tuple[str, ...]) -> rest.PayloadSelectorInclude:
+    return rest.PayloadSelectorInclude(include=list(payload_fields))
+
 
 class QueryRetriever:
     """
     Embed a natural language query and fetch the top matches from Qdrant.
+
+    Results are kept for `retrieval_cache_ttl_seconds` keyed on the query text and
+    search options, so a repeated question skips both the model and the Qdrant round
+    trip. Cached results are shared between callers and must not be mutated.
     """
 
-    def __init__(self, *, qdrant_client: QdrantClient | None = None):
+    def __init__(
+        self,
+        *,
+        qdrant_client: QdrantClient | None = None,
+        async_qdrant_client: AsyncQdrantClient | None = None,
+    ):
         self.settings = get_settings()
-        self.qdrant = qdrant_client or get_qdrant_client()
+        self.collection_name = self.settings.collection_name
+        self._qdrant = qdrant_client
+        self._async_qdrant = async_qdrant_client
+        self._results: TTLCache[tuple, RetrievalResult] | None = None
+        if self.settings.retrieval_cache_size > 0:
+            self._results = TTLCache(
+                maxsize=self.settings.retrieval_cache_size,
+                ttl=self.settings.retrieval_cache_ttl_seconds,
+            )
+        self._results_lock = threading.Lock()
+        self._in_flight: dict[tuple, asyncio.Future[RetrievalResult]] = {}
+        # Quantized collections are searched over their INT8 copies; oversample and rescore
+        # the candidates against the original vectors so recall matches a full search.
+        self._search_params: rest.SearchParams | None = None
+        if self.settings.scalar_quantization:
+            self._search_params = rest.SearchParams(
+                quantization=rest.QuantizationSearchParams(
+                    rescore=True,
+                    oversampling=self.settings.quantization_oversampling,
+                )
+            )
+
+    @property
+    def qdrant(self) -> QdrantClient:
+        # Resolved per call so a shared retriever follows the client lifecycle in app.db.
+        return self._qdrant or get_qdrant_client()
+
+    @property
+    def async_qdrant(self) -> AsyncQdrantClient:
+        return self._async_qdrant or get_async_qdrant_client()
 
     @staticmethod
     def _validate_query(query: str) -> str:
@@ -60,30 +131,201 @@ class QueryRetriever:
         cleaned = self._validate_query(query)
         return embed_query(cleaned)
 
+    async def aembed(self, query: str) -> list[float]:
+        """
+        Async counterpart of `embed` that goes through the shared query batcher.
+        """
+        cleaned = self._validate_query(query)
+        return await embed_query_batched(cleaned)
+
     def search(
         self,
         query: str,
         *,
+        query_vector: list[float] | None = None,
         limit: int = 5,
         score_threshold: float | None = None,
         with_vectors: bool = False,
-    ) -> list[RetrievedChunk]:
+        payload_fields: Sequence[str] | None = None,
+        no_cache: bool = False,
+    ) -> RetrievalResult:
         """
         Embed the query and perform a nearest-neighbour search in Qdrant.
+
+        Pass `query_vector` when the query was already embedded to skip the model call.
+        The embedding is returned alongside the chunks so callers can reuse it.
+        `payload_fields` limits the payload keys fetched for each chunk; all are returned
+        when it is None. `no_cache` bypasses the result cache in both directions.
         """
-        if limit < 1:
-            raise ValueError("Search limit must be at least 1.")
+        cleaned = self._validate_query(query)
+        payload_fields = tuple(payload_fields) if payload_fields is not None else None
+        key = (cleaned, limit, score_threshold, with_vectors, payload_fields)
+        if not no_cache and (cached := self._cached_result(key)) is not None:
+            return cached
+
+        vector = query_vector if query_vector is not None else embed_query(cleaned)
+        chunks = self.search_with_vector(
+            vector,
+            limit=limit,
+            score_threshold=score_threshold,
+            with_vectors=with_vectors,
+            payload_fields=payload_fields,
+        )
+        result = RetrievalResult(chunks=chunks, query_vector=vector)
+        if not no_cache:
+            self._remember_result(key, result)
+        return result
+
+    async def asearch(
+        self,
+        query: str,
+        *,
+        query_vector: list[float] | None = None,
+        limit: int = 5,
+        score_threshold: float | None = None,
+        with_vectors: bool = False,
+        payload_fields: Sequence[str] | None = None,
+        no_cache: bool = False,
+    ) -> RetrievalResult:
+        """
+        Async counterpart of `search` for callers on the event loop.
 
-        vector = self.embed(query)
-        results = self.qdrant.search(
-            collection_name=self.settings.collection_name,
-            query_vector=vector,
+        The query is embedded through the shared batcher and searched with the async
+        Qdrant client, so no worker thread is held while waiting on either. Identical
+        searches that arrive while one is already running wait for its result instead
+        of embedding and searching again.
+        """
+        cleaned = self._validate_query(query)
+        payload_fields = tuple(payload_fields) if payload_fields is not None else None
+        options = dict(
+            query_vector=query_vector,
             limit=limit,
-            with_payload=True,
+            score_threshold=score_threshold,
             with_vectors=with_vectors,
+            payload_fields=payload_fields,
+        )
+        if no_cache:
+            return await self._asearch_uncached(cleaned, **options)
+
+        key = (cleaned, limit, score_threshold, with_vectors, payload_fields)
+        if (cached := self._cached_result(key)) is not None:
+            return cached
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._asearch_uncached(cleaned, **options))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish_in_flight(key, done))
+        # Shielded so one caller going away does not cancel the search for the others.
+        return await asyncio.shield(task)
+
+    async def _asearch_uncached(
+        self,
+        cleaned: str,
+        *,
+        query_vector: list[float] | None,
+        limit: int,
+        score_threshold: float | None,
+        with_vectors: bool,
+        payload_fields: tuple[str, ...] | None,
+    ) -> RetrievalResult:
+        vector = query_vector if query_vector is not None else await embed_query_batched(cleaned)
+        chunks = await self.asearch_with_vector(
+            vector,
+            limit=limit,
             score_threshold=score_threshold,
+            with_vectors=with_vectors,
+            payload_fields=payload_fields,
         )
-        return [RetrievedChunk.from_scored_point(point) for point in results]
+        return RetrievalResult(chunks=chunks, query_vector=vector)
+
+    def _finish_in_flight(self, key: tuple, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._remember_result(key, task.result())
+
+    def _cached_result(self, key: tuple) -> RetrievalResult | None:
+        if self._results is None:
+            return None
+        with self._results_lock:
+            return self._results.get(key)
+
+    def _remember_result(self, key: tuple, result: RetrievalResult) -> None:
+        if self._results is None:
+            return
+        with self._results_lock:
+            self._results[key] = result
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        *,
+        limit: int = 5,
+        score_threshold: float | None = None,
+        with_vectors: bool = False,
+        payload_fields: Sequence[str] | None = None,
+    ) -> list[RetrievalResult]:
+        """
+        Search several queries with one model call and as few Qdrant requests as possible.
+
+        Results are returned in query order. Embeddings come from the shared query
+        embedding cache where possible; the rest are encoded together in a single batch.
+        Searches are sent in batch queries of at most `QDRANT_QUERY_BATCH_SIZE` requests.
+        """
+        if limit < 1:
+            raise ValueError("Search limit must be at least 1.")
+        cleaned = [self._validate_query(query) for query in queries]
+        if not cleaned:
+            return []
+
+        vectors = self._embed_many(cleaned)
+        requests = [
+            rest.QueryRequest(
+                query=vector,
+                limit=limit,
+                with_payload=_payload_selector(payload_fields),
+                with_vector=with_vectors,
+                score_threshold=score_threshold,
+                params=self._search_params,
+            )
+            for vector in vectors
+        ]
+        # Cap the request size so large query sets do not turn into one oversized call.
+        batch_size = max(1, self.settings.qdrant_query_batch_size)
+        responses = []
+        for start in range(0, len(requests), batch_size):
+            responses.extend(
+                self.qdrant.query_batch_points(
+                    collection_name=self.collection_name,
+                    requests=requests[start:start + batch_size],
+                )
+            )
+        return [
+            RetrievalResult(
+                chunks=RetrievedChunk.from_scored_points(response.points),
+                query_vector=vector,
+            )
+            for vector, response in zip(vectors, responses)
+        ]
+
+    @staticmethod
+    def _embed_many(queries: Sequence[str]) -> list[list[float]]:
+        query_cache = get_query_embedding_cache()
+        vectors = [query_cache.get(query) for query in queries]
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        if missing:
+            encoded = encode([queries[index] for index in missing], batch_size=len(missing))
+            for index, row in zip(missing, encoded):
+                vectors[index] = row.tolist()
+                query_cache.put(queries[index], vectors[index])
+        return vectors
+
+    def clear_cache(self) -> None:
+        """
+        Forget cached results, e.g. after the knowledge base changed.
+        """
+        if self._results is not None:
+            with self._results_lock:
+                self._results.clear()
 
     def search_with_vector(
         self,
@@ -92,6 +334,7 @@ class QueryRetriever:
         limit: int = 5,
         score_threshold: float | None = None,
         with_vectors: bool = False,
+        payload_fields: Sequence[str] | None = None,
     ) -> list[RetrievedChunk]:
         """
         Variant of search that accepts a pre-computed query embedding.
@@ -99,13 +342,45 @@ class QueryRetriever:
         if limit < 1:
             raise ValueError("Search limit must be at least 1.")
 
-        results = self.qdrant.search(
-            collection_name=self.settings.collection_name,
-            query_vector=vector,
+        response = self.qdrant.query_points(
+            collection_name=self.collection_name,
+            query=vector,
+            limit=limit,
+            with_payload=_payload_selector(payload_fields),
+            with_vectors=with_vectors,
+            score_threshold=score_threshold,
+            search_params=self._search_params,
+        )
+        return RetrievedChunk.from_scored_points(response.points)
+
+    async def asearch_with_vector(
+        self,
+        vector: list[float],
+        *,
+        limit: int = 5,
+        score_threshold: float | None = None,
+        with_vectors: bool = False,
+        payload_fields: Sequence[str] | None = None,
+    ) -> list[RetrievedChunk]:
+        """
+        Async variant of `search_with_vector`.
+        """
+        if limit < 1:
+            raise ValueError("Search limit must be at least 1.")
+
+        response = await self.async_qdrant.query_points(
+            collection_name=self.collection_name,
+            query=vector,
             limit=limit,
-            with_payload=True,
+            with_payload=_payload_selector(payload_fields),
             with_vectors=with_vectors,
             score_threshold=score_threshold,
+            search_params=self._search_params,
         )
-        return [RetrievedChunk.from_scored_point(point) for point in results]
+        return RetrievedChunk.from_scored_points(response.points)
+
 
+@cache
+def get_query_retriever() -> QueryRetriever:
+    """Return the process-wide query retriever."""
+    return QueryRetriever()
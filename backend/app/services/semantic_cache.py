@@ -0,0 +1,143 @@
+"""
+Semantic answer cache backed by a dedicated Qdrant collection.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Sequence
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models as rest
+
+from app.core.settings import get_settings
+from app.db.qdrant import get_async_qdrant_client, get_qdrant_client
+
+
+@dataclass(slots=True)
+class CachedAnswer:
+    """
+    Answer previously generated for a question similar to the incoming one.
+    """
+
+    answer: str
+    sources: list[dict[str, Any]]
+    score: float
+
+
+class SemanticCache:
+    """
+    Look up and store generated answers keyed by question embedding.
+
+    Rephrased questions land close to each other in embedding space, so a nearest
+    neighbour above `semantic_cache_threshold` lets the chat flow skip retrieval and
+    generation entirely. Entries are scoped per model and expire after
+    `semantic_cache_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        *,
+        qdrant_client: QdrantClient | None = None,
+        async_qdrant_client: AsyncQdrantClient | None = None,
+    ):
+        self.settings = get_settings()
+        self._qdrant = qdrant_client
+        self._async_qdrant = async_qdrant_client
+        self.collection_name = self.settings.semantic_cache_collection
+
+    @property
+    def qdrant(self) -> QdrantClient:
+        return self._qdrant or get_qdrant_client()
+
+    @property
+    def async_qdrant(self) -> AsyncQdrantClient:
+        return self._async_qdrant or get_async_qdrant_client()
+
+    async def lookup(self, vector: Sequence[float], *, model: str) -> CachedAnswer | None:
+        """
+        Return the closest cached answer for `model`, or None when nothing is similar enough.
+        """
+        cutoff = time.time() - self.settings.semantic_cache_ttl_seconds
+        response = await self.async_qdrant.query_points(
+            collection_name=self.collection_name,
+            query=list(vector),
+            query_filter=rest.Filter(
+                must=[
+                    rest.FieldCondition(key="model", match=rest.MatchValue(value=model)),
+                    rest.FieldCondition(key="created_at", range=rest.Range(gte=cutoff)),
+                ]
+            ),
+            limit=1,
+            with_payload=True,
+            with_vectors=False,
+            score_threshold=self.settings.semantic_cache_threshold,
+        )
+        if not response.points:
+            return None
+
+        point = response.points[0]
+        payload = point.payload or {}
+        answer = payload.get("answer")
+        if not isinstance(answer, str) or not answer:
+            return None
+        return CachedAnswer(
+            answer=answer,
+            sources=list(payload.get("sources") or []),
+            score=float(point.score),
+        )
+
+    async def store(
+        self,
+        vector: Sequence[float],
+        *,
+        question: str,
+        answer: str,
+        sources: list[dict[str, Any]],
+        model: str,
+        session_id: str,
+    ) -> None:
+        """
+        Remember the answer generated for `question`.
+        """
+        await self.async_qdrant.upsert(
+            collection_name=self.collection_name,
+            wait=False,
+            points=[
+                rest.PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector=list(vector),
+                    payload={
+                        "question": question,
+                        "answer": answer,
+                        "sources": sources,
+                        "model": model,
+                        "session_id": session_id,
+                        "created_at": time.time(),
+                    },
+                )
+            ],
+        )
+
+    def purge_expired(self) -> None:
+        """
+        Delete entries older than the configured TTL.
+        """
+        cutoff = time.time() - self.settings.semantic_cache_ttl_seconds
+        self.qdrant.delete(
+            collection_name=self.collection_name,
+            points_selector=rest.FilterSelector(
+                filter=rest.Filter(
+                    must=[rest.FieldCondition(key="created_at", range=rest.Range(lt=cutoff))]
+                )
+            ),
+            wait=False,
+        )
+
+
+@cache
+def get_semantic_cache() -> SemanticCache:
+    """Return the process-wide semantic cache."""
+    return SemanticCache()
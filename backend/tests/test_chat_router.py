@@ -2,7 +2,7 @@ from fastapi.testclient import TestClient
 
 from app.main import app
 from app.services.ollama import OllamaGenerationResult
-from app.services.retrieval import RetrievedChunk
+from app.services.retrieval import RetrievalResult, RetrievedChunk
 
 
 def test_chat_endpoint_success(monkeypatch):
@@ -26,55 +26,43 @@ def test_chat_endpoint_success(monkeypatch):
         def __init__(self):
             self.calls = []
 
-        def search(
+        async def asearch(
             self,
             query: str,
             *,
+            query_vector=None,
             limit: int,
             with_vectors: bool,
             score_threshold: float | None = None,
+            payload_fields=None,
         ):
             self.calls.append((query, limit, with_vectors, score_threshold))
-            return fake_chunks
+            return RetrievalResult(chunks=fake_chunks, query_vector=[0.1, 0.2, 0.3])
 
     fake_retriever = FakeRetriever()
-    monkeypatch.setattr("app.routers.chat.QueryRetriever", lambda: fake_retriever)
+    monkeypatch.setattr("app.routers.chat.get_query_retriever", lambda: fake_retriever)
 
     class FakeCollection:
         def __init__(self):
             self.inserted = []
 
-        def insert_many(self, documents):
+        async def insert_many(self, documents):
             self.inserted.extend(documents)
 
     fake_collection = FakeCollection()
-    monkeypatch.setattr("app.routers.chat.get_messages_collection", lambda: fake_collection)
+    monkeypatch.setattr("app.routers.chat.get_async_messages_collection", lambda: fake_collection)
 
     class FakeSessionsCollection:
         def __init__(self):
             self.upserts = []
 
-        def update_one(self, filter_doc, update_doc, upsert=False):
+        async def update_one(self, filter_doc, update_doc, upsert=False):
             self.upserts.append((filter_doc, update_doc, upsert))
 
     fake_sessions_collection = FakeSessionsCollection()
-    monkeypatch.setattr("app.routers.chat.get_sessions_collection", lambda: fake_sessions_collection)
-
-    async def fake_run_in_threadpool(func, *args, **kwargs):
-        return func(*args, **kwargs)
-
-    monkeypatch.setattr("app.routers.chat.run_in_threadpool", fake_run_in_threadpool)
+    monkeypatch.setattr("app.routers.chat.get_async_sessions_collection", lambda: fake_sessions_collection)
 
     class FakeOllamaClient:
-        def __init__(self, *args, **kwargs):
-            pass
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            return None
-
         async def generate(self, *, model, prompt, system_prompt=None, options=None):
             assert model == "llama3.2:3b"
             assert "Retrieved Context" in prompt
@@ -84,7 +72,7 @@ def test_chat_endpoint_success(monkeypatch):
                 done=True,
             )
 
-    monkeypatch.setattr("app.routers.chat.OllamaClient", FakeOllamaClient)
+    monkeypatch.setattr("app.routers.chat.get_ollama_client", lambda: FakeOllamaClient())
 
     client = TestClient(app)
 
@@ -109,3 +97,251 @@ def test_chat_endpoint_success(monkeypatch):
     assert fake_collection.inserted[0]["role"] == "user"
     assert fake_collection.inserted[1]["role"] == "assistant"
 
+    # Session summary rolled forward in the same background task
+    (_, session_update, upsert), = fake_sessions_collection.upserts
+    assert upsert is True
+    assert session_update["$inc"] == {"message_count": 2}
+    assert session_update["$set"]["last_message_role"] == "assistant"
+    assert session_update["$set"]["last_message_preview"] == "Mock assistant answer."
+
+
+
+def test_chat_endpoint_semantic_cache_hit(monkeypatch):
+    from app.core.settings import get_settings
+    from app.services.semantic_cache import CachedAnswer
+
+    settings = get_settings().model_copy(update={"semantic_cache_enabled": True})
+    monkeypatch.setattr("app.routers.chat.get_settings", lambda: settings)
+
+    class FakeRetriever:
+        async def aembed(self, query: str):
+            return [0.1, 0.2, 0.3]
+
+        async def asearch(self, *args, **kwargs):  # pragma: no cover - must not be reached
+            raise AssertionError("Retrieval should be skipped on a cache hit.")
+
+    monkeypatch.setattr("app.routers.chat.get_query_retriever", lambda: FakeRetriever())
+
+    class FakeSemanticCache:
+        def __init__(self):
+            self.lookups = []
+
+        async def lookup(self, vector, *, model):
+            self.lookups.append((vector, model))
+            return CachedAnswer(
+                answer="Cached answer.",
+                sources=[{"title": "Cached Page", "url": "https://example.com/cached"}],
+                score=0.97,
+            )
+
+    fake_cache = FakeSemanticCache()
+    monkeypatch.setattr("app.routers.chat.get_semantic_cache", lambda: fake_cache)
+
+    def fake_get_ollama_client():  # pragma: no cover - must not be reached
+        raise AssertionError("Generation should be skipped on a cache hit.")
+
+    monkeypatch.setattr("app.routers.chat.get_ollama_client", fake_get_ollama_client)
+
+    inserted = []
+
+    class FakeCollection:
+        async def insert_many(self, documents):
+            inserted.extend(documents)
+
+        async def update_one(self, filter_doc, update_doc, upsert=False):
+            pass
+
+    monkeypatch.setattr("app.routers.chat.get_async_messages_collection", lambda: FakeCollection())
+    monkeypatch.setattr("app.routers.chat.get_async_sessions_collection", lambda: FakeCollection())
+
+    client = TestClient(app)
+    response = client.post("/chat/", json={"message": "Explain caching."})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["answer"] == "Cached answer."
+    assert data["sources"][0]["title"] == "Cached Page"
+    assert fake_cache.lookups == [([0.1, 0.2, 0.3], "llama3.2:3b")]
+    assert [document["role"] for document in inserted] == ["user", "assistant"]
+
+
+def test_chat_stream_endpoint(monkeypatch):
+    import json
+
+    class FakeRetriever:
+        async def asearch(self, query, *, query_vector=None, limit, with_vectors, score_threshold=None, payload_fields=None):
+            return RetrievalResult(
+                chunks=[
+                    RetrievedChunk(
+                        id="1:0",
+                        score=0.8,
+                        payload={"title": "Sample Page", "content": "Streaming context."},
+                    )
+                ],
+                query_vector=[0.1, 0.2, 0.3],
+            )
+
+    monkeypatch.setattr("app.routers.chat.get_query_retriever", lambda: FakeRetriever())
+
+    class FakeOllamaClient:
+        async def generate_stream(self, *, model, prompt, system_prompt=None, options=None):
+            for fragment in ["Streamed ", "answer."]:
+                yield OllamaGenerationResult(model=model, response=fragment, done=False)
+            yield OllamaGenerationResult(model=model, response="", done=True)
+
+    monkeypatch.setattr("app.routers.chat.get_ollama_client", lambda: FakeOllamaClient())
+
+    inserted = []
+
+    class FakeCollection:
+        async def insert_many(self, documents):
+            inserted.extend(documents)
+
+        async def update_one(self, filter_doc, update_doc, upsert=False):
+            pass
+
+    monkeypatch.setattr("app.routers.chat.get_async_messages_collection", lambda: FakeCollection())
+    monkeypatch.setattr("app.routers.chat.get_async_sessions_collection", lambda: FakeCollection())
+
+    client = TestClient(app)
+    response = client.post("/chat/stream", json={"message": "Explain streaming."})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        json.loads(line[len("data: "):])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert [event["token"] for event in events if "token" in event] == ["Streamed ", "answer."]
+    final = events[-1]
+    assert final["done"] is True
+    assert final["session_id"]
+    assert final["sources"][0]["title"] == "Sample Page"
+    assert inserted[1]["content"] == "Streamed answer."
+
+
+def test_chat_stream_reports_ollama_error_lines(monkeypatch):
+    import json
+
+    import httpx
+
+    from app.services.ollama import OllamaClient
+
+    class FakeRetriever:
+        async def asearch(self, query, **kwargs):
+            return RetrievalResult(chunks=[], query_vector=[0.1, 0.2, 0.3])
+
+    monkeypatch.setattr("app.routers.chat.get_query_retriever", lambda: FakeRetriever())
+
+    # Ollama reports failures during generation as a JSON line inside a 200 stream.
+    body = (
+        json.dumps({"model": "llama3.2:3b", "response": "Partial ", "done": False})
+        + "\n"
+        + json.dumps({"error": "model runner has unexpectedly stopped"})
+        + "\n"
+    )
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+    ollama = OllamaClient(
+        http_client=httpx.AsyncClient(transport=transport, base_url="http://ollama.test"),
+    )
+    monkeypatch.setattr("app.routers.chat.get_ollama_client", lambda: ollama)
+
+    persisted = []
+
+    async def fake_persist_exchange(session_id, documents):
+        persisted.append(documents)
+
+    monkeypatch.setattr("app.routers.chat._persist_exchange", fake_persist_exchange)
+
+    client = TestClient(app)
+    response = client.post("/chat/stream", json={"message": "Explain streaming."})
+
+    assert response.status_code == 200
+    events = [
+        json.loads(line[len("data: "):])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert events[0] == {"token": "Partial "}
+    assert events[-1] == {"error": "Ollama returned an error: model runner has unexpectedly stopped"}
+    assert persisted == []
+
+
+def test_persist_exchange_drops_messages_for_deleted_session(monkeypatch):
+    import asyncio
+
+    from pymongo.errors import DuplicateKeyError
+
+    from app.routers.chat import _persist_exchange
+
+    class FakeMessagesCollection:
+        def __init__(self):
+            self.inserted = []
+            self.deleted_filters = []
+
+        async def insert_many(self, documents):
+            self.inserted.extend(documents)
+
+        async def delete_many(self, filter_doc):
+            self.deleted_filters.append(filter_doc)
+
+    class TombstonedSessionsCollection:
+        async def update_one(self, filter_doc, update_doc, upsert=False):
+            assert filter_doc["deleted_at"] == {"$exists": False}
+            raise DuplicateKeyError("E11000 duplicate key error")
+
+    messages = FakeMessagesCollection()
+    monkeypatch.setattr("app.routers.chat.get_async_messages_collection", lambda: messages)
+    monkeypatch.setattr("app.routers.chat.get_async_sessions_collection", lambda: TombstonedSessionsCollection())
+
+    documents = [
+        {"session_id": "abc", "role": "user", "content": "Hi", "created_at": None},
+        {"session_id": "abc", "role": "assistant", "content": "Hello", "created_at": None},
+    ]
+    asyncio.run(_persist_exchange("abc", documents))
+
+    assert len(messages.inserted) == 2
+    assert messages.deleted_filters == [{"session_id": "abc"}]
+
+
+def test_delete_session_tombstones_only_existing_sessions(monkeypatch):
+    from types import SimpleNamespace
+
+    class FakeMessagesCollection:
+        def __init__(self, count):
+            self.count = count
+
+        async def delete_many(self, filter_doc):
+            deleted, self.count = self.count, 0
+            return SimpleNamespace(deleted_count=deleted)
+
+    class FakeSessionsCollection:
+        def __init__(self, live):
+            self.live = live
+            self.tombstoned = []
+            self.upserts = []
+
+        async def find_one_and_update(self, filter_doc, update_doc, projection=None):
+            assert filter_doc["deleted_at"] == {"$exists": False}
+            if not self.live:
+                return None
+            self.tombstoned.append(filter_doc["session_id"])
+            return {"_id": 1}
+
+        async def update_one(self, filter_doc, update_doc, upsert=False):
+            self.upserts.append((filter_doc, upsert))
+
+    client = TestClient(app)
+
+    sessions = FakeSessionsCollection(live=False)
+    monkeypatch.setattr("app.routers.chat.get_async_messages_collection", lambda: FakeMessagesCollection(0))
+    monkeypatch.setattr("app.routers.chat.get_async_sessions_collection", lambda: sessions)
+    assert client.delete("/chat/sessions/unknown").status_code == 404
+    assert sessions.tombstoned == [] and sessions.upserts == []
+
+    sessions = FakeSessionsCollection(live=True)
+    monkeypatch.setattr("app.routers.chat.get_async_messages_collection", lambda: FakeMessagesCollection(2))
+    monkeypatch.setattr("app.routers.chat.get_async_sessions_collection", lambda: sessions)
+    assert client.delete("/chat/sessions/abc").status_code == 204
+    assert sessions.tombstoned == ["abc"] and sessions.upserts == []
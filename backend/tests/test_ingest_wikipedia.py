@@ -0,0 +1,209 @@
+import uuid
+
+import numpy as np
+
+from app.services.ingest_wikipedia import WikiPage, WikipediaIngestor, _chunk_text, _point_id
+
+
+class FakeQdrant:
+    def __init__(self):
+        self.upserts = []
+        self.waits = []
+        self.deletes = []
+
+    def upsert(self, *, collection_name, wait, points):
+        self.upserts.append(points)
+        self.waits.append(wait)
+
+    def delete(self, *, collection_name, points_selector, wait):
+        self.deletes.append(points_selector.filter)
+
+    def retrieve(self, *, collection_name, ids, with_payload, with_vectors):
+        stored = {point.id: point for batch in self.upserts for point in batch}
+        return [stored[point_id] for point_id in ids if point_id in stored]
+
+
+def _page(page_id: int, words: int) -> WikiPage:
+    return WikiPage(
+        page_id=page_id,
+        title=f"Page {page_id}",
+        url=f"https://en.wikipedia.org/wiki/Page_{page_id}",
+        content=" ".join(f"w{page_id}_{i}" for i in range(words)),
+        topic="testing",
+    )
+
+
+def test_process_pages_batches_chunks_across_pages(monkeypatch):
+    calls = []
+
+    def fake_embed_documents(documents, *, batch_size=32):
+        calls.append(list(documents))
+        # Encode each chunk's first word so the scatter back to pages can be checked.
+        return np.array([[float(hash(document.split()[0]) % 1000), 1.0] for document in documents])
+
+    monkeypatch.setattr("app.services.ingest_wikipedia.embed_documents", fake_embed_documents)
+
+    qdrant = FakeQdrant()
+    ingestor = WikipediaIngestor(qdrant_client=qdrant)
+    pages = [_page(1, 250), _page(2, 0), _page(3, 120)]
+
+    processed, embedded_chunks, skipped_pages = ingestor._process_pages(
+        pages,
+        chunk_size=100,
+        chunk_overlap=0,
+        embedding_chunk_size=4,
+        dry_run=False,
+    )
+
+    assert [page.page_id for page in processed] == [1, 3]
+    assert embedded_chunks == 5
+    assert skipped_pages == 1
+    # Five chunks from two pages share model calls instead of one call per page.
+    assert [len(call) for call in calls] == [4, 1]
+
+    # Slices are upserted as soon as they are embedded, so arrival order follows chunk length.
+    points = sorted(
+        (point for batch in qdrant.upserts for point in batch),
+        key=lambda point: (point.payload["page_id"], point.payload["chunk_index"]),
+    )
+    assert [point.payload["page_id"] for point in points] == [1, 1, 1, 3, 3]
+    for point in points:
+        first_word = point.payload["content"].split()[0]
+        assert point.vector[0] == float(hash(first_word) % 1000)
+
+
+def test_chunk_text_stops_once_the_text_is_covered():
+    words = [f"w{i}" for i in range(400)]
+
+    chunks = _chunk_text(" ".join(words), chunk_size=400, overlap=40)
+
+    # A second window starting at word 360 would be a subset of the first chunk.
+    assert chunks == [" ".join(words)]
+
+
+def test_process_pages_reuses_vectors_of_unchanged_chunks(monkeypatch):
+    calls = []
+
+    def fake_embed_documents(documents, *, batch_size=32):
+        calls.append(list(documents))
+        return np.ones((len(documents), 2))
+
+    monkeypatch.setattr("app.services.ingest_wikipedia.embed_documents", fake_embed_documents)
+
+    ingestor = WikipediaIngestor(qdrant_client=FakeQdrant())
+    options = dict(chunk_size=100, chunk_overlap=0, embedding_chunk_size=8, dry_run=False)
+
+    ingestor._process_pages([_page(1, 200)], **options)
+    assert len(calls) == 1
+
+    # Same page again plus a new one: only the new page's chunks reach the model.
+    ingestor._process_pages([_page(1, 200), _page(2, 50)], **options)
+    assert [len(call) for call in calls] == [2, 1]
+
+
+def test_process_pages_upserts_fixed_size_shards(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.ingest_wikipedia.embed_documents",
+        lambda documents, *, batch_size=32: np.ones((len(documents), 2)),
+    )
+
+    qdrant = FakeQdrant()
+    ingestor = WikipediaIngestor(qdrant_client=qdrant)
+    ingestor.settings = ingestor.settings.model_copy(update={"qdrant_upsert_batch_size": 2})
+
+    ingestor._process_pages(
+        [_page(1, 250), _page(3, 120)],
+        chunk_size=100,
+        chunk_overlap=0,
+        embedding_chunk_size=3,
+        dry_run=False,
+    )
+
+    # Embedding slices of three are regrouped into shards of two; only the last one waits.
+    assert [len(points) for points in qdrant.upserts] == [2, 2, 1]
+    assert qdrant.waits[-1] is True
+    assert not any(qdrant.waits[:-1])
+
+
+def test_point_id_matches_uuid5():
+    # Point ids must stay stable so re-ingesting a page overwrites its existing points.
+    assert _point_id(42, 7) == str(uuid.uuid5(uuid.NAMESPACE_DNS, "42:7"))
+
+
+def test_process_pages_deletes_chunks_beyond_the_new_count(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.ingest_wikipedia.embed_documents",
+        lambda documents, *, batch_size=32: np.ones((len(documents), 2)),
+    )
+
+    qdrant = FakeQdrant()
+    ingestor = WikipediaIngestor(qdrant_client=qdrant)
+    options = dict(chunk_size=100, chunk_overlap=0, embedding_chunk_size=8)
+
+    ingestor._process_pages([_page(1, 250), _page(3, 120)], dry_run=False, **options)
+
+    (stale_filter,) = qdrant.deletes
+    bounds = [
+        (condition.must[0].match.value, condition.must[1].range.gte)
+        for condition in stale_filter.should
+    ]
+    assert bounds == [(1, 3), (3, 2)]
+
+    ingestor._process_pages([_page(1, 250)], dry_run=True, **options)
+    assert len(qdrant.deletes) == 1
+
+
+def test_dry_run_does_not_read_from_qdrant(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.ingest_wikipedia.embed_documents",
+        lambda documents, *, batch_size=32: np.ones((len(documents), 2)),
+    )
+
+    class UnreachableQdrant:
+        def __getattr__(self, name):
+            raise AssertionError(f"Dry runs must not call Qdrant ({name}).")
+
+    ingestor = WikipediaIngestor(qdrant_client=UnreachableQdrant())
+
+    processed, embedded_chunks, _ = ingestor._process_pages(
+        [_page(1, 250)],
+        chunk_size=100,
+        chunk_overlap=0,
+        embedding_chunk_size=8,
+        dry_run=True,
+    )
+
+    assert [page.page_id for page in processed] == [1]
+    assert embedded_chunks == 3
+
+
+def test_overlapping_bulk_loads_restore_hnsw_once():
+    from types import SimpleNamespace
+
+    class HnswQdrant:
+        def __init__(self, m):
+            self.m = m
+            self.updates = []
+
+        def get_collection(self, collection_name):
+            return SimpleNamespace(config=SimpleNamespace(hnsw_config=SimpleNamespace(m=self.m)))
+
+        def update_collection(self, *, collection_name, hnsw_config):
+            self.m = hnsw_config.m
+            self.updates.append(hnsw_config.m)
+
+    qdrant = HnswQdrant(m=32)
+    first = WikipediaIngestor(qdrant_client=qdrant)
+    second = WikipediaIngestor(qdrant_client=qdrant)
+
+    with first._deferred_indexing(enabled=True):
+        with second._deferred_indexing(enabled=True):
+            assert qdrant.m == 0
+        assert qdrant.m == 0
+    assert qdrant.updates == [0, 32]
+
+    # A graph left disabled by an interrupted run comes back at the configured default.
+    disabled = HnswQdrant(m=0)
+    with WikipediaIngestor(qdrant_client=disabled)._deferred_indexing(enabled=True):
+        pass
+    assert disabled.m == 16
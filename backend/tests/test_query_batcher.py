@@ -0,0 +1,76 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.embeddings.batcher import QueryBatcher
+
+
+def test_query_batcher_coalesces_concurrent_queries(monkeypatch):
+    calls = []
+
+    def fake_encode(texts, *, batch_size):
+        calls.append(list(texts))
+        return np.array([[float(len(text)), 0.0] for text in texts], dtype=np.float32)
+
+    monkeypatch.setattr("app.embeddings.batcher.encode", fake_encode)
+
+    async def scenario():
+        # A full batch flushes immediately, so the long window only guards against slow test runs.
+        batcher = QueryBatcher(max_batch=3, max_wait_ms=5000.0)
+        try:
+            return await asyncio.gather(
+                batcher.embed("a"),
+                batcher.embed("bb"),
+                batcher.embed("ccc"),
+            )
+        finally:
+            await batcher.aclose()
+
+    results = asyncio.run(scenario())
+
+    assert calls == [["a", "bb", "ccc"]]
+    assert results == [[1.0, 0.0], [2.0, 0.0], [3.0, 0.0]]
+
+
+def test_query_batcher_propagates_encode_errors(monkeypatch):
+    def failing_encode(texts, *, batch_size):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr("app.embeddings.batcher.encode", failing_encode)
+
+    async def scenario():
+        batcher = QueryBatcher(max_batch=4, max_wait_ms=1.0)
+        try:
+            await batcher.embed("question")
+        finally:
+            await batcher.aclose()
+
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(scenario())
+
+
+def test_query_batcher_aclose_fails_pending_queries(monkeypatch):
+    import threading
+
+    release = threading.Event()
+
+    def blocking_encode(texts, *, batch_size):
+        release.wait(timeout=5)
+        return np.zeros((len(texts), 2), dtype=np.float32)
+
+    monkeypatch.setattr("app.embeddings.batcher.encode", blocking_encode)
+
+    async def scenario():
+        batcher = QueryBatcher(max_batch=1, max_wait_ms=1.0)
+        in_flight = asyncio.ensure_future(batcher.embed("first"))
+        queued = asyncio.ensure_future(batcher.embed("second"))
+        await asyncio.sleep(0.05)
+        await batcher.aclose()
+        release.set()
+        return await asyncio.gather(in_flight, queued, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert all("closed" in str(result) for result in results)
@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.embeddings.cache import QueryEmbeddingCache
+from app.services.retrieval import QueryRetriever
+
+
+class FakeQdrant:
+    def __init__(self):
+        self.searches = 0
+
+    def query_points(self, **kwargs):
+        self.searches += 1
+        return SimpleNamespace(points=[SimpleNamespace(id=1, score=0.9, payload={"content": "text"}, vector=None)])
+
+    def query_batch_points(self, *, collection_name, requests):
+        self.searches += 1
+        return [
+            SimpleNamespace(points=[SimpleNamespace(id=index, score=request.query[0], payload={}, vector=None)])
+            for index, request in enumerate(requests)
+        ]
+
+
+def test_search_reuses_cached_results_until_cleared(monkeypatch):
+    monkeypatch.setattr("app.services.retrieval.embed_query", lambda query: [0.1, 0.2])
+    qdrant = FakeQdrant()
+    retriever = QueryRetriever(qdrant_client=qdrant)
+
+    first = retriever.search("What is RAG?")
+    assert retriever.search("  What is RAG?  ") is first
+    assert qdrant.searches == 1
+
+    retriever.search("What is RAG?", no_cache=True)
+    assert qdrant.searches == 2
+
+    retriever.clear_cache()
+    retriever.search("What is RAG?")
+    assert qdrant.searches == 3
+
+
+def test_search_many_embeds_misses_together_and_sends_one_request(monkeypatch):
+    query_cache = QueryEmbeddingCache(maxsize=8, ttl=60)
+    query_cache.put("cached", [0.5, 0.5])
+    encoded = []
+
+    def fake_encode(texts, *, batch_size=32):
+        encoded.append(list(texts))
+        return np.array([[float(len(text)), 0.0] for text in texts])
+
+    monkeypatch.setattr("app.services.retrieval.get_query_embedding_cache", lambda: query_cache)
+    monkeypatch.setattr("app.services.retrieval.encode", fake_encode)
+    qdrant = FakeQdrant()
+    retriever = QueryRetriever(qdrant_client=qdrant)
+
+    results = retriever.search_many(["one", "cached", "three"])
+
+    assert encoded == [["one", "three"]]
+    assert qdrant.searches == 1
+    assert [result.chunks[0].score for result in results] == [3.0, 0.5, 5.0]
+    assert query_cache.get("three") == [5.0, 0.0]
+
+
+
+def test_search_many_splits_requests_by_query_batch_size(monkeypatch):
+    from app.core.settings import get_settings
+
+    settings = get_settings().model_copy(update={"qdrant_query_batch_size": 2})
+    monkeypatch.setattr("app.services.retrieval.get_settings", lambda: settings)
+    monkeypatch.setattr("app.services.retrieval.get_query_embedding_cache", lambda: QueryEmbeddingCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(
+        "app.services.retrieval.encode",
+        lambda texts, *, batch_size=32: np.array([[float(len(text)), 0.0] for text in texts]),
+    )
+    qdrant = FakeQdrant()
+    retriever = QueryRetriever(qdrant_client=qdrant)
+
+    results = retriever.search_many(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert qdrant.searches == 3
+    assert [result.chunks[0].score for result in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+def test_concurrent_identical_asearches_share_one_search(monkeypatch):
+    embeddings = []
+
+    async def fake_embed_query_batched(query):
+        embeddings.append(query)
+        await asyncio.sleep(0)
+        return [0.1, 0.2]
+
+    class FakeAsyncQdrant:
+        def __init__(self):
+            self.searches = 0
+
+        async def query_points(self, **kwargs):
+            self.searches += 1
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(points=[SimpleNamespace(id=1, score=0.9, payload={}, vector=None)])
+
+    monkeypatch.setattr("app.services.retrieval.embed_query_batched", fake_embed_query_batched)
+    qdrant = FakeAsyncQdrant()
+    retriever = QueryRetriever(qdrant_client=FakeQdrant(), async_qdrant_client=qdrant)
+
+    async def run():
+        return await asyncio.gather(*(retriever.asearch("What is RAG?") for _ in range(3)))
+
+    results = asyncio.run(run())
+
+    assert embeddings == ["What is RAG?"]
+    assert qdrant.searches == 1
+    assert results[0] is results[1] is results[2]
+    assert not retriever._in_flight
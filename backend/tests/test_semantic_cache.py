@@ -0,0 +1,41 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.semantic_cache import CachedAnswer, SemanticCache
+
+
+class FakeAsyncQdrant:
+    def __init__(self, points):
+        self.points = points
+        self.queries = []
+
+    async def query_points(self, **kwargs):
+        self.queries.append(kwargs)
+        return SimpleNamespace(points=self.points)
+
+
+def test_lookup_returns_the_cached_answer():
+    point = SimpleNamespace(
+        id="1",
+        score=0.97,
+        payload={"answer": "Cached answer.", "sources": [{"title": "Cached Page"}]},
+    )
+    qdrant = FakeAsyncQdrant([point])
+    cache = SemanticCache(async_qdrant_client=qdrant)
+
+    result = asyncio.run(cache.lookup([0.1, 0.2], model="llama3.2:3b"))
+
+    assert result == CachedAnswer(answer="Cached answer.", sources=[{"title": "Cached Page"}], score=0.97)
+    (query,) = qdrant.queries
+    assert query["query"] == [0.1, 0.2]
+    assert query["limit"] == 1
+
+
+def test_lookup_ignores_misses_and_entries_without_an_answer():
+    empty = SemanticCache(async_qdrant_client=FakeAsyncQdrant([]))
+    blank = SemanticCache(
+        async_qdrant_client=FakeAsyncQdrant([SimpleNamespace(id="1", score=0.99, payload={"answer": ""})])
+    )
+
+    assert asyncio.run(empty.lookup([0.1], model="llama3.2:3b")) is None
+    assert asyncio.run(blank.lookup([0.1], model="llama3.2:3b")) is None
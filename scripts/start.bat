@@ -25,7 +25,7 @@ REM Check and start Qdrant
 docker ps -a --filter "name=qdrant-rag" --format "{{.Names}}" | findstr "qdrant-rag" >nul 2>&1
 if errorlevel 1 (
     echo Creating and starting Qdrant container...
-    docker run -d --name qdrant-rag -p 6333:6333 qdrant/qdrant:latest
+    docker run -d --name qdrant-rag -p 6333:6333 -p 6334:6334 qdrant/qdrant:latest
 ) else (
     echo Starting Qdrant container...
     docker start qdrant-rag
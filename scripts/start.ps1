@@ -32,7 +32,7 @@ if ($qdrantExists -eq "qdrant-rag") {
     docker start qdrant-rag
 } else {
     Write-Host "Creating and starting Qdrant container..." -ForegroundColor Cyan
-    docker run -d --name qdrant-rag -p 6333:6333 qdrant/qdrant:latest
+    docker run -d --name qdrant-rag -p 6333:6333 -p 6334:6334 qdrant/qdrant:latest
 }
 
 # Check if MongoDB container exists